@@ -0,0 +1,272 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import pickle
+import random
+import argparse
+import platform
+import numpy as np
+from engine import PopulationState, rollout, STALL_WINDOW, STALL_RATIO
+from network import BatchNetwork, ACTIVATIONS, AGGREGATIONS
+from track import load_track
+from telemetry import timed
+from curriculum import Curriculum
+from driver import Driver
+from neat_config import load_config
+from sensors import DEFAULT_SPEC, car_spec
+
+#pomiar przejazdow: ticki/s, auto-ticki/s i podzial czasu na etapy ticka; --verify zamiast pomiaru
+#porownuje szybkie sciezki z wolnymi wzorcami
+
+#BatchNetwork liczy w innej kolejnosci niz neat, wiec dopuszczamy roznice rzedu bledu zaokraglen
+#(wzglednie dla wartosci > 1)
+VERIFY_TOLERANCE = 1e-11
+VERIFY_GENOMES = 200
+VERIFY_INPUTS = 20
+#mutacje syntetycznych genomow do sprawdzenia, gdy nie podano --mutations (potrzebne ukryte wezly)
+VERIFY_MUTATIONS = 30
+
+def synthetic_genomes(config, count, seed, mutations):
+    random.seed(seed)
+    genomes = []
+    for key in range(count):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)
+        genomes.append(genome)
+    return genomes
+
+#genomy z best_genome.pkl albo z checkpointu NEAT, powielane do zadanej liczby
+def recorded_genomes(path, count):
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            recorded = [pickle.load(f)["genome"]]
+    else:
+        with gzip.open(path) as f:
+            recorded = list(pickle.load(f)[2].values())
+    return [recorded[i % len(recorded)] for i in range(count)]
+
+#build_nets() zwraca sieci dla count aut (BatchNetwork albo jeden Driver dla wszystkich)
+def bench_rollout(track, build_nets, count, render=None, stall=(STALL_WINDOW, STALL_RATIO), spec=DEFAULT_SPEC):
+    phases = dict.fromkeys(["check_radar", "check_collision", "physics", "activation", "render"], 0.0)
+    start = time.perf_counter()
+    nets = build_nets()
+    compile_time = time.perf_counter() - start
+
+    state = PopulationState(count, track, *stall, spec)
+    state.check_radars = timed(phases, "check_radar", state.check_radars)
+    state.check_collision = timed(phases, "check_collision", state.check_collision)
+    state.step = timed(phases, "physics", state.step)
+    nets.choose = timed(phases, "activation", nets.choose)
+    on_tick = render(state, phases) if render else None
+
+    start = time.perf_counter()
+    rollout(state, nets, on_tick)
+    wall = time.perf_counter() - start
+
+    #physics to krok bez czujnikow i kolizji
+    phases["physics"] -= phases["check_radar"] + phases["check_collision"]
+    ticks = state.tick
+    car_ticks = int(state.time.sum())
+    return {
+        "population": count,
+        "ticks": ticks,
+        "car_ticks": car_ticks,
+        "wall_time": wall,
+        "compile_time": compile_time,
+        "ticks_per_sec": ticks / wall if wall else 0.0,
+        "car_ticks_per_sec": car_ticks / wall if wall else 0.0,
+        "phases": phases,
+        "best_fitness": float(state.fitness.max()),
+        "culled": int(state.culled.sum()),
+    }
+
+#rysowanie jak w Session.run_simulation, ale na oknie SDL dummy, bez limitu klatek
+def make_renderer(track_file, sprite_file, render_every=1, radar_top=-1):
+    import simulation
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    session = simulation.Session(Curriculum([track_file]), sprite_file,
+                                 render_every=render_every, radar_top=radar_top)
+    session.open_window()
+
+    def render(state, phases):
+        def on_tick(state, still_alive):
+            if state.tick % render_every:
+                return
+            start = time.perf_counter()
+            session.draw_frame(state, still_alive, session.generation)
+            phases["render"] += time.perf_counter() - start
+        return on_tick
+    return render
+
+#wzorzec dla Track.cast_dirs: krok co piksel jak pierwotny check_radar - pierwsza calkowita
+#dlugosc, dla ktorej piksel jest sciana, najwyzej max_range
+def march_rays(track, cx, cy, dx, dy, max_range):
+    lengths = np.arange(max_range + 1)
+    x = (cx[:, None] + dx[:, None] * lengths).astype(np.int64)
+    y = (cy[:, None] + dy[:, None] * lengths).astype(np.int64)
+    first = (track.is_wall(x, y) | (lengths == max_range)).argmax(axis=1)
+    rows = np.arange(len(cx))
+    x, y = x[rows, first], y[rows, first]
+    return x, y, np.hypot(x - cx, y - cy).astype(np.int64)
+
+#promienie ze wszystkich katow auta (kierunki z CarSpec, jak w symulacji) z losowych punktow drogi
+def verify_rays(track, spec, points, seed, chunk=2048):
+    rng = np.random.default_rng(seed)
+    cx = rng.uniform(0, track.width, points * 4)
+    cy = rng.uniform(0, track.height, points * 4)
+    road = ~track.is_wall(cx.astype(np.int64), cy.astype(np.int64))
+    cx, cy = cx[road][:points], cy[road][:points]
+    dx = np.broadcast_to(spec.ray_dx.ravel(), (len(cx), spec.ray_dx.size)).ravel()
+    dy = np.broadcast_to(spec.ray_dy.ravel(), (len(cx), spec.ray_dy.size)).ravel()
+    cx = np.repeat(cx, spec.ray_dx.size)
+    cy = np.repeat(cy, spec.ray_dy.size)
+    fast = track.cast_dirs(cx, cy, dx, dy, spec.radar_range)
+    mismatches = 0
+    for i in range(0, len(cx), chunk):
+        part = slice(i, i + chunk)
+        ref = march_rays(track, cx[part], cy[part], dx[part], dy[part], spec.radar_range)
+        differ = np.zeros(len(ref[0]), dtype=bool)
+        for got, want in zip(fast, ref):
+            differ |= got[part] != want
+        mismatches += int(differ.sum())
+    return {"rays": len(cx), "mismatches": mismatches}
+
+#BatchNetwork wobec neat.nn.FeedForwardNetwork.activate; wezly dostaja losowe funkcje aktywacji
+#i agregacji (znane obu stronom), zeby sprawdzic wszystkie, nie tylko te z configu
+def verify_networks(config, spec, seed, mutations):
+    import neat
+    genome_config = config.genome_config
+    activations = [name for name in ACTIVATIONS if genome_config.activation_defs.is_valid(name)]
+    aggregations = [name for name in AGGREGATIONS if genome_config.aggregation_function_defs.is_valid(name)]
+    genomes = synthetic_genomes(config, VERIFY_GENOMES, seed, mutations)
+    for genome in genomes:
+        for node in genome.nodes.values():
+            node.activation = random.choice(activations)
+            node.aggregation = random.choice(aggregations)
+
+    #polowa zestawow jak z radarow (calkowite), polowa dowolnych liczb
+    rng = np.random.default_rng(seed)
+    shape = (VERIFY_INPUTS, len(genomes), genome_config.num_inputs)
+    inputs = np.where(rng.random(shape) < 0.5, rng.integers(0, spec.radar_range // spec.radar_scale + 1, shape),
+                      rng.normal(0.0, 3.0, shape))
+    fast = BatchNetwork.create(genomes, config).activate(inputs)
+    ref = np.empty_like(fast)
+    for j, genome in enumerate(genomes):
+        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        for i in range(VERIFY_INPUTS):
+            ref[i, j] = net.activate(inputs[i, j].tolist())
+
+    #nieskonczonosci i NaN musza sie zgadzac co do wartosci
+    same = (fast == ref) | (np.isnan(fast) & np.isnan(ref))
+    error = np.where(same, 0.0, np.abs(fast - ref) / np.maximum(1.0, np.abs(ref)))
+    error = np.nan_to_num(error, nan=np.inf)
+    #zmiana wyboru akcji liczy sie tylko wtedy, gdy wybrane wyjscia roznia sie w neat o wiecej niz tolerancja
+    chosen, expected = fast.argmax(axis=-1), ref.argmax(axis=-1)
+    picked = np.take_along_axis(ref, chosen[..., None], axis=-1)[..., 0]
+    best = np.take_along_axis(ref, expected[..., None], axis=-1)[..., 0]
+    flips = (chosen != expected) & ~(np.abs(best - picked) <= VERIFY_TOLERANCE * np.maximum(1.0, np.abs(best)))
+    return {
+        "networks": len(genomes),
+        "activations": int(np.prod(shape[:2])),
+        "hidden_nodes": sum(len(genome.nodes) - genome_config.num_outputs for genome in genomes),
+        "max_error": float(error.max()),
+        "argmax_changes": int(flips.sum()),
+    }
+
+def verify(args, config, spec, tracks):
+    ok = True
+    for track_path in tracks:
+        result = verify_rays(load_track(track_path), spec, args.verify_points, args.seed)
+        ok &= result["mismatches"] == 0
+        print(f"{os.path.basename(track_path):12} cast_dirs: {result['rays']} promieni, "
+              f"{result['mismatches']} roznic z krokiem co piksel")
+    result = verify_networks(config, spec, args.seed, args.mutations or VERIFY_MUTATIONS)
+    ok &= result["max_error"] <= VERIFY_TOLERANCE and result["argmax_changes"] == 0
+    print(f"BatchNetwork: {result['networks']} sieci ({result['hidden_nodes']} ukrytych wezlow), "
+          f"{result['activations']} aktywacji, max blad {result['max_error']:.3g} "
+          f"(tolerancja {VERIFY_TOLERANCE:g}), zmian wyboru akcji: {result['argmax_changes']}")
+    print("OK" if ok else "NIEZGODNOSC")
+    return ok
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark przejazdow symulacji")
+    parser.add_argument("--config", default="configs/car1_config.json")
+    parser.add_argument("--tracks", nargs="*", default=None,
+                        help="domyslnie wszystkie maps/trasa*.png")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mutations", type=int, default=0,
+                        help="ile mutacji na syntetyczny genom (bogatsze topologie)")
+    parser.add_argument("--genomes", default=None,
+                        help="nagrane genomy: best_genome.pkl, checkpoint NEAT albo kierowca .npz (driver.py)")
+    parser.add_argument("--render", action="store_true", help="mierz tez rysowanie (SDL dummy)")
+    parser.add_argument("--render-every", type=int, default=1, metavar="N")
+    parser.add_argument("--radar-top", type=int, default=-1, metavar="K")
+    parser.add_argument("--stall-window", type=int, default=STALL_WINDOW)
+    parser.add_argument("--stall-ratio", type=float, default=STALL_RATIO)
+    parser.add_argument("--car", default="car1.png")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--verify", action="store_true",
+                        help="zamiast pomiaru porownaj cast_dirs i BatchNetwork z wolnymi wzorcami")
+    parser.add_argument("--verify-points", type=int, default=100, metavar="N",
+                        help="punktow startowych promieni na trase przy --verify")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+    #kierowca .npz jezdzi na czujnikach, na ktorych byl trenowany
+    spec = Driver.load(args.genomes).spec if args.genomes and args.genomes.endswith(".npz") else car_spec(config)
+
+    tracks = args.tracks or sorted(glob.glob(os.path.join("maps", "trasa*.png")))
+    if args.verify:
+        sys.exit(0 if verify(args, config, spec, tracks) else 1)
+    render = (make_renderer(os.path.basename(tracks[0]), args.car, args.render_every, args.radar_top)
+              if args.render else None)
+    kinds = ["synthetic"] + (["recorded"] if args.genomes else [])
+
+    results = []
+    for track_path in tracks:
+        track = load_track(track_path)
+        for kind in kinds:
+            for size in args.sizes:
+                if kind == "synthetic":
+                    genomes = synthetic_genomes(config, size, args.seed, args.mutations)
+                    build_nets = lambda: BatchNetwork.create(genomes, config)
+                elif args.genomes.endswith(".npz"):
+                    build_nets = lambda: Driver.load(args.genomes)
+                else:
+                    genomes = recorded_genomes(args.genomes, size)
+                    build_nets = lambda: BatchNetwork.create(genomes, config)
+                result = bench_rollout(track, build_nets, size, render, (args.stall_window, args.stall_ratio), spec)
+                result.update({"track": os.path.basename(track_path), "genomes": kind})
+                results.append(result)
+                print(f"{result['track']:12} {kind:9} {size:6} aut  {result['ticks']:5} tickow  "
+                      f"{result['ticks_per_sec']:9.1f} tick/s  {result['car_ticks_per_sec']:11.1f} auto-tick/s")
+
+    report = {
+        "seed": args.seed,
+        "config": args.config,
+        "mutations": args.mutations,
+        "render": args.render,
+        "render_every": args.render_every,
+        "radar_top": args.radar_top,
+        "stall_window": args.stall_window,
+        "stall_ratio": args.stall_ratio,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Zapisano {args.output}")
+
+if __name__ == "__main__":
+    main()
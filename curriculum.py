@@ -0,0 +1,43 @@
+import os
+import glob
+import numpy as np
+
+FITNESS_MODES = ["mean", "min", "curriculum"]
+
+#"all" - wszystkie trasy z maps/, inaczej nazwy plikow jak w selected.json
+def resolve_tracks(names):
+    if names == ["all"]:
+        return sorted(os.path.basename(path) for path in glob.glob(os.path.join("maps", "trasa*.png")))
+    return names
+
+#fitness genomu z przejazdow po kilku trasach: srednia, minimum albo program nauczania -
+#zaczyna od pierwszej trasy i doklada kolejna, gdy najlepszy genom przekroczy prog
+class Curriculum:
+    def __init__(self, track_files, mode="mean", threshold=None):
+        if mode not in FITNESS_MODES:
+            raise ValueError(f"Nieznany tryb fitness: {mode}")
+        if mode == "curriculum" and threshold is None:
+            raise ValueError("Tryb curriculum wymaga progu fitness")
+        self.track_files = list(track_files)
+        self.mode = mode
+        self.threshold = threshold
+        self.active = 1 if mode == "curriculum" else len(self.track_files)
+
+    #trasy, na ktorych ocenia sie biezaca generacja
+    @property
+    def tracks(self):
+        return self.track_files[:self.active]
+
+    #scores: (liczba tras, liczba genomow) -> fitness kazdego genomu
+    def aggregate(self, scores):
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.mode == "min":
+            return scores.min(axis=0)
+        return scores.mean(axis=0)
+
+    def update(self, fitness):
+        if self.mode != "curriculum" or self.active == len(self.track_files):
+            return
+        if max(fitness) >= self.threshold:
+            self.active += 1
+            print(f"Dodano trasę do programu: {self.track_files[self.active - 1]}")
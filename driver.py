@@ -0,0 +1,101 @@
+import os
+import json
+import argparse
+import numpy as np
+from network import BatchNetwork
+from sensors import CarSpec, car_spec
+
+#wytrenowany kierowca bez neat: siec z compile_genome zapisana jako tablice w .npz
+#(wezly w kolejnosci wyliczania, wagi, biasy) i liczona przez BatchNetwork; w metadanych
+#czujniki i akcje auta, na ktorych siec byla trenowana
+
+CHAMPION_FORMAT = 1
+LIST_FIELDS = ["inputs", "outputs", "node_keys", "layers", "bias", "response",
+               "link_src", "link_dst", "link_weight"]
+NAME_FIELDS = ["activation", "aggregation"]
+
+def export_champion(genome, config, path, **meta):
+    from network import compile_genome
+    net = compile_genome(genome, config)
+    meta.update({"format": CHAMPION_FORMAT, "fitness": genome.fitness, "key": genome.key,
+                 "car_spec": car_spec(config).to_dict()})
+    arrays = {name: np.array(net[name]) for name in LIST_FIELDS}
+    arrays.update({name: np.array(net[name], dtype=str) for name in NAME_FIELDS})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    #np.savez dopisuje .npz, jesli go brak - plik tymczasowy musi miec juz to rozszerzenie
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, meta=json.dumps(meta), **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+class Driver:
+    def __init__(self, net, meta=None):
+        self.meta = meta or {}
+        #kierowcy zapisani przed sekcja "Car" jezdzili na domyslnych czujnikach
+        self.spec = CarSpec.from_dict(self.meta.get("car_spec", {}))
+        self.num_inputs = len(net["inputs"])
+        self.num_outputs = len(net["outputs"])
+        self.net = BatchNetwork([net])
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != CHAMPION_FORMAT:
+                raise ValueError(f"Nieobslugiwany format kierowcy: {path}")
+            net = {name: data[name].tolist() for name in LIST_FIELDS + NAME_FIELDS}
+        return Driver(net, meta)
+
+    #inputs: wektor czujnikow albo macierz (liczba przypadkow, liczba wejsc)
+    def activate(self, inputs):
+        inputs = np.asarray(inputs, dtype=np.float64)
+        return self.net.activate(inputs[..., None, :])[..., 0, :]
+
+    #ten sam interfejs co BatchNetwork.choose - jeden kierowca prowadzi wszystkie auta stanu
+    def choose(self, inputs):
+        return self.activate(inputs).argmax(axis=-1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Eksport i przejazd wytrenowanego kierowcy")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="best_genome.pkl albo checkpoint NEAT -> .npz")
+    export.add_argument("source")
+    export.add_argument("output")
+    export.add_argument("--config", default="configs/car1_config.json")
+    drive = commands.add_parser("drive", help="przejazd bez okna na wybranych trasach")
+    drive.add_argument("champion")
+    drive.add_argument("--tracks", nargs="+", default=["all"])
+    return parser.parse_args()
+
+def export_command(args):
+    import gzip
+    import pickle
+    from neat_config import load_config
+    if args.source.endswith(".pkl"):
+        with open(args.source, "rb") as f:
+            genome = pickle.load(f)["genome"]
+    else:
+        with gzip.open(args.source) as f:
+            population = pickle.load(f)[2]
+        genome = max((g for g in population.values() if g.fitness is not None),
+                     key=lambda g: g.fitness, default=next(iter(population.values())))
+    config = load_config(args.config)
+    print(f"Zapisano {export_champion(genome, config, args.output, config_file=args.config)}")
+
+def drive_command(args):
+    from engine import PopulationState, rollout
+    from track import load_track
+    from curriculum import resolve_tracks
+    driver = Driver.load(args.champion)
+    for track_file in resolve_tracks(args.tracks):
+        state = rollout(PopulationState(1, load_track(os.path.join("maps", track_file)), spec=driver.spec), driver)
+        laps = state.lap_times[0]
+        print(f"{track_file:12} fitness {state.fitness[0]:12.1f}  ticki {state.tick:5}  "
+              f"okrazenia {len(laps)}" + (f"  najlepsze {min(laps):.2f}s" if laps else ""))
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "export":
+        export_command(args)
+    else:
+        drive_command(args)
@@ -1,7 +1,9 @@
 import pygame
 import sys
 import os
+import json
 import time
+from track import segment_patch, vector_path, VECTOR_FORMAT
 
 WIDTH, HEIGHT = 1920, 1080
 BRUSH_SIZE = 50
@@ -11,6 +13,7 @@ START_COLOR = (0, 255, 0)
 START_LINE_WIDTH = BRUSH_SIZE
 START_POS = (700, 800)
 START_ORIENTATION = 'vertical'
+FPS = 60
 
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -22,6 +25,8 @@ canvas.fill(BG_COLOR)
 font = pygame.font.SysFont("Arial", 24)
 message = ""
 message_time = 0
+#kreski trasy: promien pedzla i kolejne pozycje myszy
+strokes = []
 
 def draw_text_button(text, x, y, color=(0, 0, 0)):
     surf = font.render(text, True, color)
@@ -41,6 +46,13 @@ def draw_start_line(surface):
                          (START_POS[0] + BRUSH_SIZE, START_POS[1]),
                          START_LINE_WIDTH)
 
+#odcinek miedzy kolejnymi pozycjami myszy, wiec szybki ruch nie zostawia przerw
+def paint_segment(p0, p1, radius):
+    x0, y0, patch = segment_patch(p0, p1, radius, WIDTH, HEIGHT)
+    pixels = pygame.surfarray.pixels3d(canvas)
+    pixels[x0:x0 + patch.shape[0], y0:y0 + patch.shape[1]][patch] = LINE_COLOR
+    del pixels
+
 def show_message(text):
     global message, message_time
     message = text
@@ -51,13 +63,24 @@ def save_track():
     idx = 1
     while os.path.exists(f"maps/trasa{idx}.png"):
         idx += 1
-    pygame.image.save(canvas, f"maps/trasa{idx}.png")
+    png_path = f"maps/trasa{idx}.png"
+    pygame.image.save(canvas, png_path)
+    with open(vector_path(png_path), "w") as f:
+        json.dump({
+            "format": VECTOR_FORMAT,
+            "width": WIDTH,
+            "height": HEIGHT,
+            "start_pos": list(START_POS),
+            "start_orientation": START_ORIENTATION,
+            "strokes": strokes,
+        }, f)
     show_message(f"Zapisano jako trasa{idx}.png")
 
 def main():
     global BRUSH_SIZE
     drawing = False
     running = True
+    clock = pygame.time.Clock()
 
     BRUSH_SIZES = [20, 30, 40, 50, 60]
     brush_buttons = []
@@ -95,6 +118,7 @@ def main():
                         save_track()
                     elif reset_btn.collidepoint(mouse_pos):
                         canvas.fill(BG_COLOR)
+                        strokes.clear()
                         show_message("Wyczyszczono i rozpoczęto nową trasę")
                     elif exit_btn.collidepoint(mouse_pos):
                         show_message("Powrót do menu")
@@ -107,16 +131,21 @@ def main():
                                 break
                         else:
                             drawing = True
+                            strokes.append({"radius": BRUSH_SIZE, "points": [list(event.pos)]})
+                            paint_segment(event.pos, event.pos, BRUSH_SIZE)
+
+            elif event.type == pygame.MOUSEMOTION and drawing:
+                points = strokes[-1]["points"]
+                if list(event.pos) != points[-1]:
+                    paint_segment(points[-1], event.pos, BRUSH_SIZE)
+                    points.append(list(event.pos))
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     drawing = False
 
-        if drawing:
-            mx, my = pygame.mouse.get_pos()
-            pygame.draw.circle(canvas, LINE_COLOR, (mx, my), BRUSH_SIZE)
-
         pygame.display.flip()
+        clock.tick(FPS)
 
     pygame.quit()
     sys.exit()
@@ -0,0 +1,177 @@
+import numpy as np
+from sensors import DEFAULT_SPEC
+
+WIDTH = 1920
+HEIGHT = 1080
+CAR_SIZE_X = 50
+CAR_SIZE_Y = 50
+START_POS = (700, 800)
+CORNER_ANGLES = [30, 150, 210, 330]
+START_SPEED = 20
+MIN_SPEED = 12
+#staly krok symulacji: czasy okrazen liczone w tickach i przeliczane na sekundy po nominalnym tempie
+TICKS_PER_SECOND = 60
+MAX_TICKS = 30 * TICKS_PER_SECOND
+#auto, ktorego slad z ostatnich STALL_WINDOW tickow miesci sie w prostokacie o przekatnej
+#mniejszej niz STALL_RATIO przejechanej drogi, kreci sie w miejscu - odpada jak po kolizji (0 = wylaczone)
+STALL_WINDOW = 2 * TICKS_PER_SECOND
+STALL_RATIO = 0.25
+
+#stan calej populacji w tablicach - jeden krok liczy wszystkie zywe auta naraz;
+#spec (sensors.CarSpec) okresla radary, wejscia sieci i znaczenie jej wyjsc
+class PopulationState:
+    def __init__(self, count, track, stall_window=STALL_WINDOW, stall_ratio=STALL_RATIO, spec=DEFAULT_SPEC):
+        self.track = track
+        self.spec = spec
+        self.count = count
+        self.stall_window = stall_window
+        self.stall_ratio = stall_ratio
+        self.x = np.full(count, float(track.start_pos[0]))
+        self.y = np.full(count, float(track.start_pos[1]))
+        self.angle = np.full(count, float(track.start_angle))
+        self.speed = np.zeros(count)
+        self.started = False
+        self.tick = 0
+        self.alive = np.ones(count, dtype=bool)
+        self.distance = np.zeros(count)
+        self.time = np.zeros(count, dtype=np.int64)
+        self.fitness = np.zeros(count)
+        #postep wzdluz trasy narastajaco (kolejne okrazenia sie sumuja, jazda w tyl odejmuje)
+        start = track.progress_at([track.start_pos[0] + CAR_SIZE_X / 2], [track.start_pos[1] + CAR_SIZE_Y / 2])
+        self.last_progress = np.full(count, max(start[0], 0.0))
+        self.progress = self.last_progress.copy()
+        self.laps = np.zeros(count, dtype=np.int64)
+        self.last_lap_tick = np.zeros(count, dtype=np.int64)
+        self.lap_times = [[] for _ in range(count)]
+        #najlepsze okrazenie calej populacji, aktualizowane przy kazdym nowym okrazeniu
+        self.fastest_lap = None
+        self.culled = np.zeros(count, dtype=bool)
+        self.stall_x = np.zeros((stall_window, count))
+        self.stall_y = np.zeros((stall_window, count))
+        self.stall_distance = np.zeros((stall_window, count))
+        rays = len(spec.radar_angles)
+        self.radar_x = np.zeros((count, rays), dtype=np.int64)
+        self.radar_y = np.zeros((count, rays), dtype=np.int64)
+        self.radar_dist = np.zeros((count, rays), dtype=np.int64)
+
+    @property
+    def center_x(self):
+        return self.x + CAR_SIZE_X / 2
+
+    @property
+    def center_y(self):
+        return self.y + CAR_SIZE_Y / 2
+
+    def get_data(self):
+        return self.spec.encode(self.radar_dist, self.speed)
+
+    #choice - numer wyjscia sieci, akcje z spec.actions (domyslnie lewo, prawo, hamowanie, gaz)
+    def steer(self, idx, choice):
+        self.angle[idx] += self.spec.turn[choice]
+        speed = self.speed[idx]
+        accel = self.spec.accel[choice]
+        self.speed[idx] = np.where((accel < 0) & (speed + accel < MIN_SPEED), speed, speed + accel)
+
+    def step(self):
+        idx = np.flatnonzero(self.alive)
+        self.tick += 1
+        if not self.started:
+            self.speed[:] = START_SPEED
+            self.started = True
+
+        angle = self.angle[idx]
+        speed = self.speed[idx]
+        rad = np.radians(360 - angle)
+        x = np.clip(self.x[idx] + np.cos(rad) * speed, 20, WIDTH - 120)
+        y = np.clip(self.y[idx] + np.sin(rad) * speed, 20, HEIGHT - 120)
+        self.x[idx] = x
+        self.y[idx] = y
+        self.distance[idx] += speed
+        self.time[idx] += 1
+
+        cx = x + CAR_SIZE_X / 2
+        cy = y + CAR_SIZE_Y / 2
+        self.check_progress(idx, cx, cy)
+        self.check_collision(idx, cx, cy, angle)
+        self.check_stall(idx, cx, cy)
+        self.check_radars(idx, cx, cy, angle)
+
+        #postep zamiast przejechanej drogi - kolko w miejscu i jazda w tyl nic nie daja
+        self.fitness[idx] += np.maximum(self.progress[idx], 0) / (CAR_SIZE_X / 2)
+        return len(idx)
+
+    #odczyt z siatki postepu trasy; skok o wiecej niz pol okrazenia to przejazd przez linie startu,
+    #a okrazenie liczy sie, gdy postep pierwszy raz przekroczy kolejna wielokrotnosc lap_length
+    def check_progress(self, idx, cx, cy):
+        length = self.track.lap_length
+        raw = self.track.progress_at(cx, cy)
+        on_road = raw >= 0
+        idx, raw = idx[on_road], raw[on_road]
+        delta = raw - self.last_progress[idx]
+        delta -= length * np.round(delta / length)
+        self.last_progress[idx] = raw
+        self.progress[idx] += delta
+        laps = np.floor(self.progress[idx] / length).astype(np.int64)
+        for i in idx[laps > self.laps[idx]]:
+            lap = (self.tick - self.last_lap_tick[i]) / TICKS_PER_SECOND
+            self.lap_times[i].append(lap)
+            if self.fastest_lap is None or lap < self.fastest_lap:
+                self.fastest_lap = lap
+            self.laps[i] += 1
+            self.last_lap_tick[i] = self.tick
+
+    #kolizje - ktorykolwiek naroznik na scianie
+    def check_collision(self, idx, cx, cy, angle):
+        l = 0.5 * CAR_SIZE_X
+        rad = np.radians(360 - (angle[:, None] + CORNER_ANGLES))
+        px = (cx[:, None] + np.cos(rad) * l).astype(np.int64)
+        py = (cy[:, None] + np.sin(rad) * l).astype(np.int64)
+        self.alive[idx] = ~self.track.is_wall(px, py).any(axis=1)
+
+    #ostatnie stall_window pozycji w buforze cyklicznym; kolko w miejscu nie zwieksza postepu,
+    #ale bez odciecia jezdziloby do konca czasu
+    def check_stall(self, idx, cx, cy):
+        if not self.stall_window:
+            return
+        slot = self.tick % self.stall_window
+        path = self.distance[idx] - self.stall_distance[slot, idx]
+        self.stall_x[slot, idx] = cx
+        self.stall_y[slot, idx] = cy
+        self.stall_distance[slot, idx] = self.distance[idx]
+        if self.tick < self.stall_window:
+            return
+        xs = self.stall_x[:, idx]
+        ys = self.stall_y[:, idx]
+        spread = np.hypot(xs.max(axis=0) - xs.min(axis=0), ys.max(axis=0) - ys.min(axis=0))
+        stalled = idx[(spread < self.stall_ratio * path) & self.alive[idx]]
+        self.alive[stalled] = False
+        self.culled[stalled] = True
+
+    def check_radars(self, idx, cx, cy, angle):
+        dx, dy = self.spec.directions(angle)
+        x, y, dist = self.track.cast_dirs(cx[:, None], cy[:, None], dx, dy, self.spec.radar_range)
+        self.radar_x[idx] = x
+        self.radar_y[idx] = y
+        self.radar_dist[idx] = dist
+
+#jedna generacja: sieci (BatchNetwork) decyduja, stan robi krok, az wszystkie auta odpadna
+#albo skonczy sie czas; on_tick(state, still_alive) wola sie po kazdym kroku, np. do rysowania,
+#a recorder (replay.ReplayRecorder) dostaje stan startowy i kazdy kolejny, lacznie z ostatnim
+def rollout(state, nets, on_tick=None, recorder=None):
+    counter = 0
+    if recorder is not None:
+        recorder.record(state)
+    while True:
+        alive = np.flatnonzero(state.alive)
+        choices = nets.choose(state.get_data())
+        state.steer(alive, choices[alive])
+
+        still_alive = state.step()
+        if recorder is not None:
+            recorder.record(state)
+        if still_alive == 0 or counter > MAX_TICKS:
+            return state
+
+        if on_tick is not None:
+            on_tick(state, still_alive)
+        counter += 1
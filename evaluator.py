@@ -0,0 +1,125 @@
+import os
+import multiprocessing
+import numpy as np
+from engine import PopulationState, rollout, STALL_WINDOW, STALL_RATIO
+from track import load_track
+from network import BatchNetwork, compile_genome
+from replay import ReplayRecorder, replay_path
+from telemetry import TickProfile, merge_profiles
+from memo import FitnessCache, net_hash
+from sensors import DEFAULT_SPEC, car_spec
+
+#trasy ladowane raz na proces roboczy
+worker_tracks = {}
+worker_stall = (STALL_WINDOW, STALL_RATIO)
+
+def init_worker(track_files, stall_window, stall_ratio):
+    global worker_tracks, worker_stall
+    worker_tracks = {name: load_track(os.path.join("maps", name)) for name in track_files}
+    worker_stall = (stall_window, stall_ratio)
+
+#pelny przejazd bez okna dla czesci populacji na jednej trasie (sieci z compile_genome), zwraca
+#(fitness, czasy okrazen) dla kazdej sieci i profil przejazdu; z record_path proces zapisuje
+#tez powtorke swojej czesci
+def evaluate_chunk(nets, track_file, record_path=None, generation=0, car=None, spec=DEFAULT_SPEC):
+    track = worker_tracks[track_file]
+    count = len(nets)
+    nets = BatchNetwork(nets)
+    state = PopulationState(count, track, *worker_stall, spec)
+    profile = TickProfile(state, nets)
+    recorder = None
+    if record_path is not None:
+        recorder = ReplayRecorder(record_path, count, track.png_path, generation, car)
+    rollout(state, nets, recorder=recorder)
+    if recorder is not None:
+        recorder.close()
+    results = [(float(state.fitness[i]), list(state.lap_times[i])) for i in range(count)]
+    return results, profile.summary()
+
+def split_chunks(items, count):
+    size, extra = divmod(len(items), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+#jak neat.ParallelEvaluator, ale kazdy proces dostaje cala paczke genomow i liczy ja wektorowo;
+#paczki wszystkich tras z programu (Curriculum) ida naraz, wiec trasy licza sie rownolegle
+class ParallelEvaluator:
+    def __init__(self, num_workers, curriculum, stall_window=STALL_WINDOW, stall_ratio=STALL_RATIO,
+                 generation=0, record_dir=None, record_every=1, car=None, cache=None):
+        self.num_workers = num_workers
+        self.curriculum = curriculum
+        #trasy tez w glownym procesie: skroty do cache i cache tras zbudowany przed startem procesow
+        self.tracks = {name: load_track(os.path.join("maps", name)) for name in curriculum.track_files}
+        self.cache = cache or FitnessCache(0, stall_window, stall_ratio)
+        self.generation = generation
+        self.record_dir = record_dir
+        self.record_every = record_every
+        self.car = car
+        self.start_workers(curriculum.track_files, stall_window, stall_ratio)
+        self.lap_times = {}
+        self.profile = None
+
+    def start_workers(self, track_files, stall_window, stall_ratio):
+        self.pool = multiprocessing.Pool(self.num_workers, initializer=init_worker,
+                                         initargs=(track_files, stall_window, stall_ratio))
+
+    #argumenty evaluate_chunk -> obiekt z get() zwracajacym jej wynik
+    def submit(self, args):
+        return self.pool.apply_async(evaluate_chunk, args)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def evaluate(self, genomes, config):
+        self.generation += 1
+        record = self.record_dir is not None and self.generation % self.record_every == 0
+        genomes = list(genomes)
+        nets = [compile_genome(genome, config) for _, genome in genomes]
+        net_keys = [net_hash(net) for net in nets]
+        spec = car_spec(config)
+        hits = self.cache.hits
+        tracks = self.curriculum.tracks
+
+        #genomy spoza cache ze wszystkich tras wysylane naraz, w tylu paczkach na trase,
+        #zeby wszystkie procesy mialy prace
+        pending = []
+        for track_file in tracks:
+            keys = [self.cache.key(net_key, self.tracks[track_file], spec) for net_key in net_keys]
+            results, groups = self.cache.partition(keys, lookup=not record)
+            chunks = split_chunks(groups, -(-self.num_workers // len(tracks)))
+            jobs = []
+            for part, chunk in enumerate(chunks):
+                record_path = replay_path(self.record_dir, self.generation, track_file, part) if record else None
+                jobs.append(self.submit(([nets[group[0]] for group in chunk], track_file,
+                                         record_path, self.generation, self.car, spec)))
+            pending.append((track_file, keys, results, chunks, jobs))
+
+        scores = np.zeros((len(tracks), len(genomes)))
+        self.lap_times = {}
+        profiles = []
+        for i, (track_file, keys, results, chunks, jobs) in enumerate(pending):
+            for chunk, job in zip(chunks, jobs):
+                computed, profile = job.get()
+                profiles.append(profile)
+                self.cache.fill(keys, results, chunk, computed)
+            scores[i] = [fitness for fitness, laps in results]
+            self.lap_times[track_file] = {genome_id: laps for (genome_id, _), (fitness, laps) in zip(genomes, results)}
+        self.profile = merge_profiles(profiles)
+        self.profile["cache_hits"] = self.cache.hits - hits
+
+        fitness = self.curriculum.aggregate(scores)
+        for (genome_id, genome), value in zip(genomes, fitness):
+            genome.fitness = float(value)
+        self.curriculum.update(fitness)
+
+        for track_file, lap_times in self.lap_times.items():
+            fastest_lap = min((min(laps) for laps in lap_times.values() if laps), default=None)
+            if fastest_lap is not None:
+                print(f"Naj. Okrążenie: {fastest_lap:.2f}s" + (f" ({track_file})" if len(tracks) > 1 else ""))
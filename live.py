@@ -0,0 +1,126 @@
+import time
+import threading
+import neat
+from engine import CAR_SIZE_X, CAR_SIZE_Y, TICKS_PER_SECOND
+
+#podglad treningu bez blokowania symulacji: pop.run idzie w osobnym watku tak szybko, jak moze,
+#i zostawia kopie stanu, a okno w glownym watku (pygame obsluguje zdarzenia tylko tam) rysuje
+#najnowsza kopie w swoim tempie i odsyla polecenia - pauza, tempo, zapis, koniec po generacji
+
+#tempo ogladanej generacji jako wielokrotnosc czasu rzeczywistego, None - bez limitu
+SPEEDS = [0.25, 0.5, 1, 2, 4, 8, None]
+
+class StopTraining(Exception):
+    pass
+
+#kopia pol PopulationState, z ktorych korzysta Session.draw_frame; po utworzeniu sie nie zmienia
+class Snapshot:
+    def __init__(self, state, still_alive, generation):
+        self.track = state.track
+        self.tick = state.tick
+        self.generation = generation
+        self.still_alive = still_alive
+        self.fastest_lap = state.fastest_lap
+        self.x = state.x.copy()
+        self.y = state.y.copy()
+        self.angle = state.angle.copy()
+        self.speed = state.speed.copy()
+        self.alive = state.alive.copy()
+        self.fitness = state.fitness.copy()
+        self.radar_x = state.radar_x.copy()
+        self.radar_y = state.radar_y.copy()
+
+    @property
+    def center_x(self):
+        return self.x + CAR_SIZE_X / 2
+
+    @property
+    def center_y(self):
+        return self.y + CAR_SIZE_Y / 2
+
+#stan wspolny obu watkow bez blokad: symulacja podmienia referencje na nowa kopie (atomowo),
+#okno ja zabiera; nowa kopia powstaje dopiero po zabraniu poprzedniej, wiec kopiowanie
+#kosztuje najwyzej tyle razy na sekunde, ile okno ma klatek
+class LiveState:
+    def __init__(self, speed=None):
+        self.snapshot = None
+        self.taken = True
+        self.speed = speed
+        self.running = threading.Event()
+        self.running.set()
+        self.stop = False
+        self.save = False
+        self.anchor = None
+
+    @property
+    def paused(self):
+        return not self.running.is_set()
+
+    def publish(self, state, still_alive, generation):
+        if self.taken:
+            self.snapshot = Snapshot(state, still_alive, generation)
+            self.taken = False
+
+    def take(self):
+        snapshot = self.snapshot
+        self.taken = True
+        return snapshot
+
+    #strona symulacji, po kazdym ticku ogladanej generacji: czeka w pauzie i trzyma wybrane tempo;
+    #kazda generacja zaczyna od ticku 1, wiec tick nie wiekszy niz w kotwicy to nowa generacja
+    def throttle(self, tick):
+        if not self.running.is_set():
+            self.running.wait()
+            self.anchor = None
+        speed = self.speed
+        now = time.perf_counter()
+        if speed is None:
+            self.anchor = None
+        elif self.anchor is None or self.anchor[2] != speed or tick <= self.anchor[1]:
+            self.anchor = (now, tick, speed)
+        else:
+            delay = self.anchor[0] + (tick - self.anchor[1]) / (TICKS_PER_SECOND * speed) - now
+            if delay > 0:
+                time.sleep(delay)
+
+    #polecenia z okna
+    def toggle_pause(self):
+        if self.running.is_set():
+            self.running.clear()
+        else:
+            self.running.set()
+
+    def change_speed(self, offset):
+        i = min(max(SPEEDS.index(self.speed) + offset, 0), len(SPEEDS) - 1)
+        self.speed = SPEEDS[i]
+
+    #reszta generacji bez pauzy i limitu tempa
+    def request_stop(self):
+        self.stop = True
+        self.speed = None
+        self.running.set()
+
+#na koniec generacji: checkpoint na zadanie z okna, a po "zakoncz" checkpoint i koniec pop.run
+class ControlReporter(neat.reporting.BaseReporter):
+    def __init__(self, live, checkpointer):
+        self.live = live
+        self.checkpointer = checkpointer
+
+    #reporter trafia do checkpointu (przez species_set), a watki i zdarzenia sie nie pickluja
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["live"] = None
+        return state
+
+    def end_generation(self, config, population, species_set):
+        live = self.live
+        if live is None or not (live.save or live.stop):
+            return
+        checkpointer = self.checkpointer
+        #checkpointer (dodany wczesniej) mogl juz zapisac te generacje
+        if checkpointer.last_generation_checkpoint != checkpointer.current_generation:
+            checkpointer.save_checkpoint(config, population, species_set, checkpointer.current_generation)
+            checkpointer.last_generation_checkpoint = checkpointer.current_generation
+        live.save = False
+        if live.stop:
+            raise StopTraining()
@@ -0,0 +1,56 @@
+import hashlib
+from collections import OrderedDict
+from engine import MAX_TICKS, TICKS_PER_SECOND, STALL_WINDOW, STALL_RATIO
+
+CACHE_SIZE = 10000
+
+#skrot tego, co faktycznie jezdzi - sieci z compile_genome, wiec wylaczone polaczenia
+#i wezly bez wplywu na wyjscia nie zmieniaja klucza
+def net_hash(net):
+    return hashlib.sha1(repr(sorted(net.items())).encode()).hexdigest()
+
+#auta na siebie nie wplywaja, a przejazd jest deterministyczny, wiec wynik genomu zalezy
+#tylko od sieci, trasy, czujnikow auta i parametrow symulacji; elity i identyczne potomstwo biora go z cache
+class FitnessCache:
+    def __init__(self, size=CACHE_SIZE, stall_window=STALL_WINDOW, stall_ratio=STALL_RATIO):
+        self.size = size
+        self.params = (stall_window, stall_ratio, MAX_TICKS, TICKS_PER_SECOND)
+        self.entries = OrderedDict()
+        self.hits = 0
+
+    def key(self, net_key, track, spec):
+        return (net_key, track.hash, spec.key, self.params)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if not self.size:
+            return
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    #wyniki z cache i grupy indeksow do policzenia - z kazdej grupy jedzie tylko pierwszy genom;
+    #lookup=False (rysowanie, powtorka) liczy kazdy genom osobno
+    def partition(self, keys, lookup=True):
+        results = [None] * len(keys)
+        groups = {}
+        for i, key in enumerate(keys):
+            cached = self.get(key) if lookup else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                groups.setdefault(key if lookup else i, []).append(i)
+        return results, list(groups.values())
+
+    def fill(self, keys, results, groups, computed):
+        for group, result in zip(groups, computed):
+            self.put(keys[group[0]], result)
+            for i in group:
+                results[i] = result
@@ -142,6 +142,10 @@ def run_track_menu():
                 for rect, track in delete_rects:
                     if rect.collidepoint(mouse_pos):
                         os.remove(f"maps/{track}")
+                        for path in (os.path.join("maps", "cache", track.replace(".png", ".track")),
+                                     os.path.join("maps", track.replace(".png", ".json"))):
+                            if os.path.exists(path):
+                                os.remove(path)
                         print(f"Usunięto trasę: {track}")
                         break
                 if create_rect.collidepoint(mouse_pos):
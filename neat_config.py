@@ -0,0 +1,121 @@
+import os
+import json
+from configparser import ConfigParser
+from importlib.metadata import version, PackageNotFoundError
+import neat
+from network import ACTIVATIONS, AGGREGATIONS
+from sensors import CarSpec
+
+#neat.Config zbudowany wprost z configs/*.json, bez pliku INI na dysku; wynik jest
+#zwyklym neat.Config, wiec pickluje sie do checkpointow i procesow roboczych jak dotad;
+#opcjonalna sekcja "Car" (czujniki i akcje auta) trafia do config.car_spec
+
+TYPES = (neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation)
+#build_config czyta prywatne listy parametrow neat (neat.Config i konfiguracji genomu);
+#sprawdzone z ta wersja neat-python
+NEAT_VERSION = "0.92"
+configs = {}
+
+#prywatne pole neat; inna wersja biblioteki moze go nie miec - wtedy czytelny blad zamiast AttributeError
+def neat_internal(obj, name):
+    try:
+        return getattr(obj, name)
+    except AttributeError:
+        try:
+            installed = version("neat-python")
+        except PackageNotFoundError:
+            installed = "nieznana"
+        raise ValueError(f"neat-python {installed} nie ma pola {name} - konfiguracja wymaga "
+                         f"neat-python=={NEAT_VERSION}") from None
+
+def section_names(types=TYPES):
+    return ["NEAT"] + [t.__name__ for t in types]
+
+#te same napisy, ktore trafialy do pliku INI (true -> "True")
+def to_parser(data):
+    parser = ConfigParser()
+    parser.read_dict({section: {key: str(val) for key, val in items.items()}
+                      for section, items in data.items()})
+    return parser
+
+def check_sections(data, types=TYPES):
+    expected = section_names(types)
+    missing = [name for name in expected if name not in data]
+    unknown = [name for name in data if name not in expected]
+    if missing:
+        raise ValueError(f"Brak sekcji konfiguracji: {', '.join(missing)}")
+    if unknown:
+        raise ValueError(f"Nieznane sekcje konfiguracji: {', '.join(unknown)}")
+
+#neat sam nie sprawdza nadmiarowych kluczy genomu, a BatchNetwork liczy tylko czesc funkcji
+def check_genome(genome_config, items):
+    known = {p.name for p in neat_internal(genome_config, "_params")}
+    unknown = sorted(key for key in items if key not in known)
+    if unknown:
+        raise ValueError(f"Nieznane parametry genomu: {', '.join(unknown)}")
+    for name in genome_config.activation_options:
+        if name not in ACTIVATIONS:
+            raise ValueError(f"Nieobslugiwana funkcja aktywacji: {name}")
+    for name in genome_config.aggregation_options:
+        if name not in AGGREGATIONS:
+            raise ValueError(f"Nieobslugiwana agregacja: {name}")
+    if genome_config.num_inputs < 1 or genome_config.num_outputs < 1:
+        raise ValueError("num_inputs i num_outputs musza byc dodatnie")
+
+#wejscia i wyjscia sieci musza odpowiadac czujnikom i akcjom auta
+def check_car(genome_config, spec):
+    if genome_config.num_inputs != spec.num_inputs:
+        raise ValueError(f"num_inputs = {genome_config.num_inputs}, a czujniki auta daja {spec.num_inputs} wejsc")
+    if genome_config.num_outputs != spec.num_outputs:
+        raise ValueError(f"num_outputs = {genome_config.num_outputs}, a auto ma {spec.num_outputs} akcji")
+
+#to samo co neat.Config.__init__, ale z ConfigParser zbudowanego w pamieci
+def build_config(data, types=TYPES):
+    data = dict(data)
+    spec = CarSpec.from_dict(data.pop("Car", {}))
+    check_sections(data, types)
+    genome_type, reproduction_type, species_set_type, stagnation_type = types
+    parameters = to_parser(data)
+    config = neat.Config.__new__(neat.Config)
+    config.genome_type = genome_type
+    config.reproduction_type = reproduction_type
+    config.species_set_type = species_set_type
+    config.stagnation_type = stagnation_type
+
+    params = neat_internal(neat.Config, "_Config__params")
+    for p in params:
+        if parameters.has_option("NEAT", p.name):
+            setattr(config, p.name, p.parse("NEAT", parameters))
+        elif p.default is not None:
+            setattr(config, p.name, p.default)
+        else:
+            raise ValueError(f"Brak parametru sekcji NEAT: {p.name}")
+    unknown = sorted(set(data["NEAT"]) - {p.name for p in params})
+    if unknown:
+        raise ValueError(f"Nieznane parametry sekcji NEAT: {', '.join(unknown)}")
+
+    try:
+        config.genome_config = genome_type.parse_config(dict(parameters.items(genome_type.__name__)))
+        config.species_set_config = species_set_type.parse_config(dict(parameters.items(species_set_type.__name__)))
+        config.stagnation_config = stagnation_type.parse_config(dict(parameters.items(stagnation_type.__name__)))
+        config.reproduction_config = reproduction_type.parse_config(dict(parameters.items(reproduction_type.__name__)))
+    except (RuntimeError, neat.config.UnknownConfigItemError) as e:
+        raise ValueError(str(e)) from e
+    check_genome(config.genome_config, data[genome_type.__name__])
+    check_car(config.genome_config, spec)
+    config.car_spec = spec
+    return config
+
+#konfiguracja z pliku JSON, wczytywana raz na proces (dopoki plik sie nie zmieni)
+def load_config(json_path):
+    key = (os.path.abspath(json_path), os.path.getmtime(json_path))
+    config = configs.get(key)
+    if config is None:
+        with open(json_path) as f:
+            data = json.load(f)
+        try:
+            config = build_config(data)
+        except ValueError as e:
+            raise ValueError(f"{json_path}: {e}") from e
+        configs[key] = config
+    return config
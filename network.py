@@ -0,0 +1,143 @@
+import numpy as np
+
+#odpowiedniki funkcji z neat.activations liczone na calych wektorach
+ACTIVATIONS = {
+    "sigmoid": lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    "tanh": lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    "sin": lambda z: np.sin(np.clip(5.0 * z, -60.0, 60.0)),
+    "gauss": lambda z: np.exp(-5.0 * np.clip(z, -3.4, 3.4) ** 2),
+    "relu": lambda z: np.where(z > 0.0, z, 0.0),
+    "softplus": lambda z: 0.2 * np.log(1 + np.exp(np.clip(5.0 * z, -60.0, 60.0))),
+    "identity": lambda z: z,
+    "clamped": lambda z: np.clip(z, -1.0, 1.0),
+    "inv": lambda z: np.divide(1.0, z, out=np.zeros_like(z), where=z != 0),
+    "log": lambda z: np.log(np.maximum(1e-7, z)),
+    "exp": lambda z: np.exp(np.clip(z, -60.0, 60.0)),
+    "abs": np.abs,
+    "hat": lambda z: np.maximum(0.0, 1 - np.abs(z)),
+    "square": lambda z: z ** 2,
+    "cube": lambda z: z ** 3,
+}
+
+AGGREGATIONS = {
+    "sum": np.add,
+    "product": np.multiply,
+    "max": np.maximum,
+    "min": np.minimum,
+    "mean": np.add,
+}
+
+#siec genomu w kolejnosci wyliczania, jak FeedForwardNetwork.create, ale jako zwykle listy;
+#neat potrzebny tylko tutaj, gotowe sieci (driver.py) licza sie bez niego
+def compile_genome(genome, config):
+    from neat.graphs import feed_forward_layers
+    genome_config = config.genome_config
+    connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+    layers = feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections)
+
+    net = {
+        "inputs": list(genome_config.input_keys),
+        "outputs": list(genome_config.output_keys),
+        "node_keys": [], "layers": [], "activation": [], "aggregation": [],
+        "bias": [], "response": [],
+        "link_src": [], "link_dst": [], "link_weight": [],
+    }
+    for depth, layer in enumerate(layers):
+        for node in sorted(layer):
+            ng = genome.nodes[node]
+            if ng.activation not in ACTIVATIONS:
+                raise ValueError(f"Nieobslugiwana funkcja aktywacji: {ng.activation}")
+            if ng.aggregation not in AGGREGATIONS:
+                raise ValueError(f"Nieobslugiwana agregacja: {ng.aggregation}")
+            net["node_keys"].append(node)
+            net["layers"].append(depth)
+            net["activation"].append(ng.activation)
+            net["aggregation"].append(ng.aggregation)
+            net["bias"].append(ng.bias)
+            net["response"].append(ng.response)
+            for conn_key in connections:
+                if conn_key[1] == node:
+                    net["link_src"].append(conn_key[0])
+                    net["link_dst"].append(node)
+                    net["link_weight"].append(genome.connections[conn_key].weight)
+    return net
+
+#wszystkie sieci populacji sklejone w jeden graf: kazda warstwa kazdej agregacji
+#to jedno reduceat po polaczeniach, wiec koszt ticka nie zalezy od liczby sieci w Pythonie
+class BatchNetwork:
+    def __init__(self, nets):
+        self.count = len(nets)
+        index = []
+        size = 0
+        for net in nets:
+            keys = {}
+            for key in net["inputs"] + net["outputs"] + net["node_keys"]:
+                if key not in keys:
+                    keys[key] = size
+                    size += 1
+            index.append(keys)
+        self.size = size
+        self.input_idx = np.array([[keys[k] for k in net["inputs"]] for net, keys in zip(nets, index)],
+                                  dtype=np.int64).reshape(self.count, -1)
+        self.output_idx = np.array([[keys[k] for k in net["outputs"]] for net, keys in zip(nets, index)],
+                                   dtype=np.int64).reshape(self.count, -1)
+
+        #grupy (warstwa, agregacja) -> wezly i ich polaczenia ulozone po kolei
+        groups = {}
+        for net, keys in zip(nets, index):
+            links = {}
+            for src, dst, weight in zip(net["link_src"], net["link_dst"], net["link_weight"]):
+                links.setdefault(dst, []).append((keys[src], weight))
+            for i, node in enumerate(net["node_keys"]):
+                group = groups.setdefault((net["layers"][i], net["aggregation"][i]), {
+                    "nodes": [], "bias": [], "response": [], "activation": [],
+                    "starts": [], "src": [], "weight": []})
+                group["nodes"].append(keys[node])
+                group["bias"].append(net["bias"][i])
+                group["response"].append(net["response"][i])
+                group["activation"].append(net["activation"][i])
+                group["starts"].append(len(group["src"]))
+                for src, weight in links[node]:
+                    group["src"].append(src)
+                    group["weight"].append(weight)
+
+        self.groups = []
+        for (depth, aggregation), g in sorted(groups.items(), key=lambda item: item[0][0]):
+            activation = np.array(g["activation"])
+            acts = [(ACTIVATIONS[name], np.flatnonzero(activation == name)) for name in np.unique(activation)]
+            starts = np.array(g["starts"], dtype=np.int64)
+            counts = np.diff(np.append(starts, len(g["src"])))
+            self.groups.append((
+                np.array(g["nodes"], dtype=np.int64),
+                starts,
+                np.array(g["src"], dtype=np.int64),
+                np.array(g["weight"], dtype=np.float64),
+                np.array(g["bias"], dtype=np.float64),
+                np.array(g["response"], dtype=np.float64),
+                AGGREGATIONS[aggregation],
+                counts if aggregation == "mean" else None,
+                acts,
+            ))
+
+    @staticmethod
+    def create(genomes, config):
+        return BatchNetwork([compile_genome(genome, config) for genome in genomes])
+
+    #inputs: macierz (liczba sieci, liczba wejsc), wynik: (liczba sieci, liczba wyjsc);
+    #dodatkowe wymiary z przodu to niezalezne zestawy wejsc liczone naraz
+    def activate(self, inputs):
+        inputs = np.asarray(inputs)
+        values = np.zeros(inputs.shape[:-2] + (self.size,))
+        values[..., self.input_idx] = inputs
+        for nodes, starts, src, weight, bias, response, agg, counts, acts in self.groups:
+            s = agg.reduceat(values[..., src] * weight, starts, axis=-1)
+            if counts is not None:
+                s = s / counts
+            z = bias + response * s
+            for func, pos in acts:
+                values[..., nodes[pos]] = func(z[..., pos])
+        return values[..., self.output_idx]
+
+    #jak output.index(max(output)) - pierwsze maksimum
+    def choose(self, inputs):
+        return self.activate(inputs).argmax(axis=-1)
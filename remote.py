@@ -0,0 +1,252 @@
+import os
+import sys
+import queue
+import socket
+import argparse
+import ipaddress
+import threading
+import traceback
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from engine import STALL_WINDOW, STALL_RATIO
+import evaluator
+from evaluator import ParallelEvaluator, evaluate_chunk, init_worker
+
+#ocena genomow na innych maszynach: proces roboczy (python remote.py --listen host:port) czeka
+#na koordynatora, laduje trasy u siebie i liczy paczki sieci z compile_genome tym samym
+#evaluate_chunk co lokalna pula; adres bez dwukropka to gniazdo uniksowe
+
+#tyle paczek naraz czeka u jednego procesu - kolejna jest juz wyslana, gdy wraca wynik poprzedniej
+PIPELINE_DEPTH = 2
+#polaczenie bez odpowiedzi przez tyle sekund uznajemy za zerwane
+WORKER_TIMEOUT = 300.0
+#pickle po sieci wykonuje kod - polaczenie bez wspolnego klucza ($SI_WORKER_KEY po obu stronach)
+#jest odrzucane; staly klucz z repozytorium wolno uzyc tylko w obrebie jednej maszyny
+AUTHKEY_ENV = "SI_WORKER_KEY"
+LOCAL_AUTHKEY = "si_project-local"
+
+def parse_address(address):
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        return address
+    return (host or "127.0.0.1", int(port))
+
+#gniazdo uniksowe albo adres petli zwrotnej
+def is_local(address):
+    address = parse_address(address)
+    if isinstance(address, str):
+        return True
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(address[0])).is_loopback
+    except (OSError, ValueError):
+        return False
+
+def resolve_authkey(address):
+    key = os.environ.get(AUTHKEY_ENV)
+    if key:
+        return key.encode()
+    if is_local(address):
+        return LOCAL_AUTHKEY.encode()
+    raise ValueError(f"{address} nie jest adresem lokalnym - ustaw wspolny klucz w ${AUTHKEY_ENV}")
+
+#wiadomosci to krotki (rodzaj, dane); odpowiedz ("ok", wynik) albo ("error", opis)
+def handle(conn):
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (OSError, EOFError):
+            return
+        try:
+            if kind == "init":
+                track_files, hashes, stall_window, stall_ratio = payload
+                init_worker(track_files, stall_window, stall_ratio)
+                #inne pliki tras niz u koordynatora daja inne wyniki niz te w jego cache
+                changed = [name for name in track_files if evaluator.worker_tracks[name].hash != hashes[name]]
+                if changed:
+                    raise ValueError(f"Inne trasy niz u koordynatora: {', '.join(changed)}")
+                result = None
+            elif kind == "chunk":
+                result = evaluate_chunk(*payload)
+            else:
+                raise ValueError(f"Nieznana wiadomosc: {kind}")
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+        else:
+            conn.send(("ok", result))
+
+def serve(address):
+    with Listener(parse_address(address), authkey=resolve_authkey(address)) as listener:
+        print(f"Proces roboczy czeka na {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                print(f"Odrzucono polaczenie: {e}")
+                continue
+            print(f"Polaczono z {listener.last_accepted}")
+            with conn:
+                handle(conn)
+            print("Koordynator rozlaczony")
+
+#paczka czekajaca w kolejce albo u procesu roboczego; get() jak w AsyncResult z multiprocessing
+class RemoteJob:
+    def __init__(self, args):
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+    def get(self):
+        self.done.wait()
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.result
+
+#polaczenie z jednym procesem roboczym; watek bierze paczki ze wspolnej kolejki, a gdy
+#polaczenie padnie, jego niedokonczone paczki wracaja do kolejki dla pozostalych
+class WorkerLink:
+    def __init__(self, address, conn, owner):
+        self.address = address
+        self.conn = conn
+        self.owner = owner
+        self.inflight = deque()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        jobs = self.owner.jobs
+        try:
+            while True:
+                if len(self.inflight) < PIPELINE_DEPTH:
+                    try:
+                        job = jobs.get(block=not self.inflight)
+                    except queue.Empty:
+                        pass
+                    else:
+                        if job is None:
+                            break
+                        self.inflight.append(job)
+                        self.conn.send(("chunk", job.args))
+                        continue
+                if not self.conn.poll(self.owner.timeout):
+                    raise TimeoutError(f"brak odpowiedzi przez {self.owner.timeout:.0f}s")
+                kind, payload = self.conn.recv()
+                job = self.inflight.popleft()
+                if kind == "ok":
+                    job.finish(payload)
+                else:
+                    job.finish(error=f"{self.address}: {payload}")
+        except (OSError, EOFError) as e:
+            print(f"Proces roboczy {self.address} odpadl: {e}")
+            self.owner.drop(self)
+        finally:
+            self.conn.close()
+
+#ParallelEvaluator z procesami roboczymi pod podanymi adresami zamiast lokalnej puli
+class RemoteEvaluator(ParallelEvaluator):
+    def __init__(self, addresses, curriculum, stall_window=STALL_WINDOW, stall_ratio=STALL_RATIO,
+                 generation=0, record_dir=None, record_every=1, car=None, cache=None,
+                 timeout=WORKER_TIMEOUT):
+        #evaluate_chunk zapisuje powtorki na dysku procesu roboczego, a nie koordynatora
+        if record_dir is not None:
+            raise ValueError("Powtorki (record_dir) nie sa obslugiwane przy ocenie na procesach roboczych")
+        self.addresses = list(addresses)
+        #brak klucza dla adresu sieciowego to blad konfiguracji - zglaszany przed treningiem
+        self.authkeys = {address: resolve_authkey(address) for address in self.addresses}
+        self.timeout = timeout
+        self.jobs = queue.Queue()
+        self.links = []
+        self.missing = set()
+        self.lock = threading.Lock()
+        #paczek na trase tyle, zeby kazdy proces mial pelny potok
+        super().__init__(len(self.addresses) * PIPELINE_DEPTH, curriculum, stall_window, stall_ratio,
+                         generation, record_dir, record_every, car, cache)
+
+    def start_workers(self, track_files, stall_window, stall_ratio):
+        self.init_message = ("init", (track_files, {name: self.tracks[name].hash for name in track_files},
+                                      stall_window, stall_ratio))
+        self.connect()
+
+    #laczy sie z procesami, ktorych nie ma (na starcie i po zerwaniu, przed kazda generacja)
+    def connect(self):
+        connected = {link.address for link in self.links}
+        for address in self.addresses:
+            if address in connected:
+                continue
+            try:
+                conn = Client(parse_address(address), authkey=self.authkeys[address])
+                conn.send(self.init_message)
+                if not conn.poll(self.timeout):
+                    raise TimeoutError("brak odpowiedzi na init")
+                kind, payload = conn.recv()
+            except (OSError, EOFError) as e:
+                if address not in self.missing:
+                    print(f"Brak procesu roboczego {address}: {e}")
+                    self.missing.add(address)
+                continue
+            self.missing.discard(address)
+            if kind != "ok":
+                conn.close()
+                raise RuntimeError(f"{address}: {payload}")
+            with self.lock:
+                self.links.append(WorkerLink(address, conn, self))
+        if not self.links:
+            raise RuntimeError("Zaden proces roboczy nie jest dostepny")
+
+    def drop(self, link):
+        with self.lock:
+            self.links.remove(link)
+            for job in link.inflight:
+                self.jobs.put(job)
+            if self.links:
+                return
+            #nikt juz nie odbierze kolejki - paczki koncza sie bledem zamiast wisiec
+            while True:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job.finish(error="Wszystkie procesy robocze odpadly")
+
+    def submit(self, args):
+        job = RemoteJob(args)
+        with self.lock:
+            if not self.links:
+                raise RuntimeError("Wszystkie procesy robocze odpadly")
+            self.jobs.put(job)
+        return job
+
+    def evaluate(self, genomes, config):
+        if len(self.links) < len(self.addresses):
+            self.connect()
+        return super().evaluate(genomes, config)
+
+    def close(self):
+        links = list(self.links)
+        for _ in links:
+            self.jobs.put(None)
+        for link in links:
+            link.thread.join()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Proces roboczy do oceny genomow na innej maszynie")
+    parser.add_argument("--listen", default="127.0.0.1:6001", metavar="ADRES",
+                        help="host:port albo sciezka gniazda uniksowego")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        serve(args.listen)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,181 @@
+import os
+import json
+import zlib
+import struct
+import numpy as np
+from engine import TICKS_PER_SECOND
+
+REPLAY_FORMAT = 1
+HEADER_SIZE = 4096
+#pozycja zapisywana w 1/16 piksela, zeby zmiescic sie w int16 (1920 * 16 < 32767)
+POSITION_SCALE = 16
+BLOCK_TICKS = TICKS_PER_SECOND
+BLOCK_HEADER = struct.Struct("<II")
+
+def replay_path(directory, generation, track_file, part=None):
+    name = f"gen-{generation:04d}-{os.path.splitext(track_file)[0]}" + (f"-p{part}" if part is not None else "")
+    return os.path.join(directory, name + ".replay")
+
+#wszystkie pliki jednej generacji (osobno dla kazdej trasy, a przy --workers kazdy proces
+#zapisuje swoja czesc)
+def generation_files(directory, generation):
+    prefix = f"gen-{generation:04d}"
+    names = sorted(name for name in os.listdir(directory)
+                   if name.endswith(".replay") and name[:len(prefix)] == prefix
+                   and name[len(prefix)] in ".-")
+    return [os.path.join(directory, name) for name in names]
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return json.loads(f.read(HEADER_SIZE))
+
+#pliki generacji pogrupowane po trasie
+def generation_tracks(directory, generation):
+    tracks = {}
+    for path in generation_files(directory, generation):
+        tracks.setdefault(read_header(path)["track"], []).append(path)
+    return tracks
+
+def recorded_generations(directory):
+    found = set()
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        if name.startswith("gen-") and name.endswith(".replay"):
+            found.add(int(name[4:8]))
+    return sorted(found)
+
+#zapis przejazdu: naglowek JSON (HEADER_SIZE bajtow), potem bloki po BLOCK_TICKS tickow,
+#kazdy skompresowany zlib; w bloku pierwsza klatka jest pelna, kolejne to roznice
+class ReplayRecorder:
+    def __init__(self, path, count, track_png, generation=0, car=None, block_ticks=BLOCK_TICKS):
+        self.path = path
+        self.count = count
+        self.block_ticks = block_ticks
+        self.header = {
+            "format": REPLAY_FORMAT,
+            "count": count,
+            "track": os.path.basename(track_png),
+            "car": car,
+            "generation": generation,
+            "ticks_per_second": TICKS_PER_SECOND,
+            "position_scale": POSITION_SCALE,
+            "block_ticks": block_ticks,
+            "ticks": 0,
+        }
+        self.frames = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.file = open(self.tmp_path, "wb")
+        self.file.write(self.encode_header())
+
+    def encode_header(self):
+        raw = json.dumps(self.header).encode()
+        if len(raw) > HEADER_SIZE:
+            raise ValueError("Naglowek powtorki za dlugi")
+        return raw.ljust(HEADER_SIZE, b" ")
+
+    def record(self, state):
+        self.frames.append((
+            np.round(state.x * POSITION_SCALE).astype(np.int16),
+            np.round(state.y * POSITION_SCALE).astype(np.int16),
+            np.round(state.angle % 360).astype(np.int16),
+            np.round(state.speed).astype(np.int16),
+            np.packbits(state.alive),
+        ))
+        self.header["ticks"] += 1
+        if len(self.frames) == self.block_ticks:
+            self.flush()
+
+    def flush(self):
+        if not self.frames:
+            return
+        parts = []
+        for field in range(4):
+            values = np.stack([frame[field] for frame in self.frames])
+            values[1:] = np.diff(values, axis=0)
+            parts.append(values.tobytes())
+        parts.append(np.stack([frame[4] for frame in self.frames]).tobytes())
+        data = zlib.compress(b"".join(parts), 6)
+        self.file.write(BLOCK_HEADER.pack(len(self.frames), len(data)))
+        self.file.write(data)
+        self.frames = []
+
+    #naglowek ma stala dlugosc, wiec liczbe tickow dopisujemy na koncu w miejscu
+    def close(self):
+        self.flush()
+        self.file.seek(0)
+        self.file.write(self.encode_header())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+#odczyt powtorki: przy otwarciu tylko indeks blokow, klatki dekompresowane na zadanie
+class Replay:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header = json.loads(f.read(HEADER_SIZE))
+            if self.header.get("format") != REPLAY_FORMAT:
+                raise ValueError(f"Nieobslugiwany format powtorki: {path}")
+            self.blocks = []
+            tick = 0
+            while True:
+                raw = f.read(BLOCK_HEADER.size)
+                if len(raw) < BLOCK_HEADER.size:
+                    break
+                ticks, size = BLOCK_HEADER.unpack(raw)
+                self.blocks.append((tick, ticks, f.tell(), size))
+                tick += ticks
+                f.seek(size, os.SEEK_CUR)
+        self.count = self.header["count"]
+        self.ticks = tick
+        self.cached = (None, None)
+
+    def read_block(self, index):
+        if self.cached[0] == index:
+            return self.cached[1]
+        start, ticks, offset, size = self.blocks[index]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(size))
+        shape = (ticks, self.count)
+        field_size = ticks * self.count * 2
+        fields = []
+        for field in range(4):
+            values = np.frombuffer(data, dtype=np.int16, count=ticks * self.count,
+                                   offset=field * field_size).reshape(shape)
+            fields.append(np.cumsum(values, axis=0).astype(np.int16))
+        packed = np.frombuffer(data, dtype=np.uint8, offset=4 * field_size).reshape(ticks, -1)
+        alive = np.unpackbits(packed, axis=1, count=self.count).astype(bool)
+        scale = self.header["position_scale"]
+        block = {
+            "x": fields[0] / scale,
+            "y": fields[1] / scale,
+            "angle": fields[2].astype(np.float64),
+            "speed": fields[3].astype(np.float64),
+            "alive": alive,
+        }
+        self.cached = (index, block)
+        return block
+
+    #klatka dla ticka; po koncu nagrania zostaje ostatnia klatka
+    def frame(self, tick):
+        tick = min(max(int(tick), 0), self.ticks - 1)
+        index = np.searchsorted([block[0] for block in self.blocks], tick, side="right") - 1
+        block = self.read_block(index)
+        row = tick - self.blocks[index][0]
+        return {name: values[row] for name, values in block.items()}
+
+    def frames(self, start=0):
+        for tick in range(start, self.ticks):
+            yield self.frame(tick)
+
+#kilka czesci jednej generacji jako jedna powtorka (auta sklejone po kolei)
+class ReplaySet:
+    def __init__(self, paths):
+        self.parts = [Replay(path) for path in paths]
+        self.header = self.parts[0].header
+        self.count = sum(part.count for part in self.parts)
+        self.ticks = max(part.ticks for part in self.parts)
+
+    def frame(self, tick):
+        frames = [part.frame(tick) for part in self.parts]
+        return {name: np.concatenate([frame[name] for frame in frames]) for name in frames[0]}
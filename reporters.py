@@ -0,0 +1,131 @@
+import os
+import re
+import json
+import time
+import gzip
+import pickle
+import random
+import itertools
+import neat
+from telemetry import peak_rss_mb
+
+CHECKPOINT_PREFIX = "neat-checkpoint-"
+
+#zapis do pliku tymczasowego i podmiana - przerwany zapis nie psuje poprzedniego pliku
+def atomic_dump(data, path, compress=False):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with (gzip.open(tmp_path, "wb", compresslevel=5) if compress else open(tmp_path, "wb")) as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+#neat.Checkpointer z atomowym zapisem; zapisuje numer nastepnej generacji,
+#bo zapisywana populacja to juz potomstwo (w neat 0.92 wznowienie powtarzalo numer)
+class AtomicCheckpointer(neat.Checkpointer):
+    def __init__(self, directory, generation_interval=5, time_interval_seconds=None):
+        super().__init__(generation_interval, time_interval_seconds,
+                         os.path.join(directory, CHECKPOINT_PREFIX))
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        filename = f"{self.filename_prefix}{generation + 1}"
+        data = (generation + 1, config, population, species_set, random.getstate())
+        atomic_dump(data, filename, compress=True)
+        print(f"Zapisano checkpoint: {filename}")
+
+#neat 0.92 odtwarza populacje z nowym DefaultReproduction (numeracja genomow od 1, wiec
+#potomstwo nadpisywaloby elity) i ze starym, zapiklowanym ReporterSet w species_set
+def restore_checkpoint(path):
+    pop = neat.Checkpointer.restore_checkpoint(path)
+    pop.reproduction.genome_indexer = itertools.count(max(pop.population) + 1)
+    pop.species.reporters = pop.reporters
+    return pop
+
+#nowy trening w katalogu po innym: checkpointy i najlepszy genom poprzedniego ida do
+#podkatalogu, zeby --resume latest ani eksport kierowcy nie wziely cudzego przebiegu
+def archive_run(directory):
+    if not os.path.isdir(directory):
+        return None
+    names = [name for name in os.listdir(directory)
+             if name.startswith(CHECKPOINT_PREFIX) or name in ("best_genome.pkl", "champion.npz")]
+    if not names:
+        return None
+    archive = os.path.join(directory, time.strftime("previous-%Y%m%d-%H%M%S"))
+    os.makedirs(archive, exist_ok=True)
+    for name in names:
+        os.replace(os.path.join(directory, name), os.path.join(archive, name))
+    return archive
+
+def latest_checkpoint(directory):
+    pattern = re.compile(re.escape(CHECKPOINT_PREFIX) + r"(\d+)$")
+    found = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(directory, name)))
+    return max(found)[1] if found else None
+
+def load_best_genome(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+#najlepszy genom calego treningu, nadpisywany tylko gdy pojawi sie lepszy
+class BestGenomeReporter(neat.reporting.BaseReporter):
+    def __init__(self, path):
+        self.path = path
+        self.best_fitness = None
+        self.generation = None
+        if os.path.exists(path):
+            self.best_fitness = load_best_genome(path)["fitness"]
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if best_genome.fitness is None:
+            return
+        if self.best_fitness is None or best_genome.fitness > self.best_fitness:
+            self.best_fitness = best_genome.fitness
+            atomic_dump({"genome": best_genome, "fitness": best_genome.fitness,
+                         "generation": self.generation}, self.path)
+
+#jedna linia JSON na generacje: czasy, przepustowosc, etapy ticka, pamiec, krzywa zywych aut
+#i fitness; source (Session albo ParallelEvaluator) wystawia profile ostatniej oceny,
+#a zapis odbywa sie raz na generacje, poza petla tickow
+class TelemetryReporter(neat.reporting.BaseReporter):
+    def __init__(self, path, source):
+        self.source = source
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "a")
+        self.generation = None
+        self.start = None
+
+    #neat zapisuje reportery w checkpoincie (przez species_set), a plik i zrodlo profili
+    #(okno, pula procesow) nie daja sie zserializowac
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["file"] = state["source"] = None
+        return state
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        wall_time = time.perf_counter() - self.start
+        profile = self.source.profile
+        busy_time = wall_time - profile["wait_time"]
+        fitness = [genome.fitness for genome in population.values()]
+        record = {"generation": self.generation, "timestamp": time.time(), "wall_time": wall_time}
+        record.update(profile)
+        record.update({
+            "population": len(fitness),
+            "species": len(species.species),
+            #pauza i limit tempa w oknie to nie praca symulacji
+            "car_ticks_per_sec": profile["car_ticks"] / busy_time if busy_time > 0 else 0.0,
+            "peak_rss_mb": max(profile["peak_rss_mb"], peak_rss_mb()),
+            "best_fitness": max(fitness),
+            "mean_fitness": sum(fitness) / len(fitness),
+        })
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
@@ -0,0 +1,95 @@
+import numpy as np
+
+#czujniki i sterowanie auta z sekcji "Car" konfiguracji: katy i zasieg radarow, kodowanie
+#odleglosci, opcjonalnie predkosc na wejsciu oraz lista akcji odpowiadajacych wyjsciom sieci
+
+RADAR_ANGLES = [-120, -90, -60, -30, 0, 30, 60, 90, 120]
+RADAR_RANGE = 300
+#odleglosc radaru dzielona przez tyle (bez continuous - z zaokragleniem w dol)
+RADAR_SCALE = 30
+SPEED_SCALE = 10
+#akcja -> (skret w stopniach, zmiana predkosci); hamowanie nie schodzi ponizej MIN_SPEED
+ACTIONS = {
+    "left": (10, 0),
+    "right": (-10, 0),
+    "brake": (0, -2),
+    "gas": (0, 2),
+    "coast": (0, 0),
+}
+DEFAULT_ACTIONS = ["left", "right", "brake", "gas"]
+FIELDS = ["radar_angles", "radar_range", "radar_scale", "continuous", "speed_input", "speed_scale", "actions"]
+
+class CarSpec:
+    def __init__(self, radar_angles=RADAR_ANGLES, radar_range=RADAR_RANGE, radar_scale=RADAR_SCALE,
+                 continuous=False, speed_input=False, speed_scale=SPEED_SCALE, actions=DEFAULT_ACTIONS):
+        if not radar_angles or any(int(a) != a for a in radar_angles):
+            raise ValueError("radar_angles musi byc niepusta lista calkowitych katow")
+        if radar_range < 1 or radar_scale <= 0 or speed_scale <= 0:
+            raise ValueError("radar_range, radar_scale i speed_scale musza byc dodatnie")
+        unknown = [name for name in actions if name not in ACTIONS]
+        if unknown or not actions:
+            raise ValueError(f"Nieznane akcje: {', '.join(unknown)} (dostepne: {', '.join(ACTIONS)})")
+        self.radar_angles = [int(a) for a in radar_angles]
+        self.radar_range = int(radar_range)
+        self.radar_scale = radar_scale
+        self.continuous = bool(continuous)
+        self.speed_input = bool(speed_input)
+        self.speed_scale = speed_scale
+        self.actions = list(actions)
+        #dekoder akcji: wybrane wyjscie sieci -> skret i zmiana predkosci jednym indeksowaniem
+        self.turn = np.array([ACTIONS[name][0] for name in self.actions], dtype=np.float64)
+        self.accel = np.array([ACTIONS[name][1] for name in self.actions], dtype=np.float64)
+        #skrety sa calkowite, wiec kat auta tez - kierunki promieni dla kazdego kata 0..359
+        #liczymy raz zamiast cos/sin w kazdym ticku
+        rad = np.radians(360 - (np.arange(360)[:, None] + np.array(self.radar_angles, dtype=np.float64)))
+        self.ray_dx = np.cos(rad)
+        self.ray_dy = np.sin(rad)
+
+    @property
+    def num_inputs(self):
+        return len(self.radar_angles) + self.speed_input
+
+    @property
+    def num_outputs(self):
+        return len(self.actions)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    @staticmethod
+    def from_dict(data):
+        unknown = sorted(set(data) - set(FIELDS))
+        if unknown:
+            raise ValueError(f"Nieznane parametry auta: {', '.join(unknown)}")
+        return CarSpec(**data)
+
+    #spec trafia do neat.Config, a wiec do checkpointow i paczek dla procesow roboczych -
+    #wystarcza parametry, tablice powstaja od nowa
+    def __reduce__(self):
+        return (CarSpec.from_dict, (self.to_dict(),))
+
+    #czesc klucza FitnessCache - inne czujniki to inny wynik tej samej sieci
+    @property
+    def key(self):
+        return repr(sorted(self.to_dict().items()))
+
+    #angle: (liczba aut,) -> kierunki promieni (liczba aut, liczba radarow)
+    def directions(self, angle):
+        bucket = angle.astype(np.int64) % 360
+        return self.ray_dx[bucket], self.ray_dy[bucket]
+
+    #wejscia sieci dla wszystkich aut naraz
+    def encode(self, radar_dist, speed):
+        if self.continuous:
+            inputs = radar_dist / self.radar_scale
+        else:
+            inputs = radar_dist // self.radar_scale
+        if self.speed_input:
+            inputs = np.concatenate([inputs, speed[:, None] / self.speed_scale], axis=1)
+        return inputs
+
+DEFAULT_SPEC = CarSpec()
+
+#checkpointy sprzed sekcji "Car" maja config bez specyfikacji - wtedy domyslne czujniki
+def car_spec(config):
+    return getattr(config, "car_spec", DEFAULT_SPEC)
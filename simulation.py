@@ -1,272 +1,404 @@
 import pygame
 import neat
-import math
 import os
 import json
-import tempfile
 import sys
+import argparse
+import random
+import threading
+import numpy as np
+from track import load_track
+from evaluator import ParallelEvaluator
+from remote import RemoteEvaluator, WORKER_TIMEOUT
+from live import LiveState, ControlReporter, StopTraining, SPEEDS
+from sensors import car_spec
+from network import BatchNetwork, compile_genome
+from memo import FitnessCache, CACHE_SIZE, net_hash
+from replay import ReplayRecorder, replay_path
+from reporters import (AtomicCheckpointer, BestGenomeReporter, TelemetryReporter, latest_checkpoint,
+                       load_best_genome, restore_checkpoint, archive_run)
+from driver import export_champion
+from neat_config import load_config
+from telemetry import TickProfile, merge_profiles
+from sprites import load_sprite_atlas, ROTATION_STEP
+from curriculum import Curriculum, FITNESS_MODES, resolve_tracks
+from engine import PopulationState, rollout, WIDTH, HEIGHT, CAR_SIZE_X, CAR_SIZE_Y, STALL_WINDOW, STALL_RATIO
 
-WIDTH = 1920
-HEIGHT = 1080
-CAR_SIZE_X = 50
-CAR_SIZE_Y = 50
-START_POS = (700, 800) 
-START_ORIENTATION = 'vertical'
-START_LINE_WIDTH = 50
 START_LINE_COLOR = (0, 255, 0)
-BORDER_COLOR = (255, 255, 255, 255)
-LAP_ZONE_RADIUS = 60
-current_generation = 0
-
-#load config
-with open("selected.json") as f:
-    data = json.load(f)
-    selected_track = data.get("track")
-    selected_car = data.get("car")
-    selected_config = data.get("config")
-
-if not selected_track or not selected_car or not selected_config:
-    print("Error: Nie wybrano trasy, samochodu lub konfiguracji")
-    sys.exit(1)
-
-def load_neat_config(json_path):
-    with open(json_path) as f:
-        data = json.load(f)
-
-    temp = tempfile.NamedTemporaryFile(delete=False, mode='w', suffix='.ini')
-    for section, items in data.items():
-        temp.write(f"[{section}]\n")
-        for key, val in items.items():
-            temp.write(f"{key} = {val}\n")
-        temp.write("\n")
-    temp.close()
-    return temp.name
-
-#klasa samochodu
-class Car:
-    def __init__(self, sprite_file):
-        self.sprite = pygame.image.load(f"assets/{sprite_file}").convert()
-        self.sprite = pygame.transform.scale(self.sprite, (CAR_SIZE_X, CAR_SIZE_Y))
-        self.rotated_sprite = self.sprite
-        self.position = [700, 800]
-        self.angle = 0
-        self.speed = 0
-        self.speed_set = False
-        self.center = [self.position[0] + CAR_SIZE_X / 2, self.position[1] + CAR_SIZE_Y / 2]
-        self.radars = []
-        self.alive = True
-        self.distance = 0
-        self.time = 0
-        self.lap_times = []
-        self.last_lap_time = None
-        self.lap_completed = False
-        
-     
-    def draw(self, screen):
-        screen.blit(self.rotated_sprite, self.position)
-        for radar in self.radars:
-            pos = radar[0]
-            pygame.draw.line(screen, (0, 0, 255), self.center, pos, 1)
-            pygame.draw.circle(screen, (0, 0, 255), pos, 5)
-    #kolizje
-    def check_collision(self, game_map):
-        self.alive = True
-        for point in self.corners:
-            if game_map.get_at((int(point[0]), int(point[1]))) == BORDER_COLOR:
-                self.alive = False
-                break
-
-    def check_radar(self, degree, game_map):
-        length = 0
-        x = int(self.center[0])
-        y = int(self.center[1])
-        while not game_map.get_at((x, y)) == BORDER_COLOR and length < 300:
-            length += 1
-            x = int(self.center[0] + math.cos(math.radians(360 - (self.angle + degree))) * length)
-            y = int(self.center[1] + math.sin(math.radians(360 - (self.angle + degree))) * length)
-        dist = int(math.hypot(x - self.center[0], y - self.center[1]))
-        self.radars.append([(x, y), dist])
-
-    def update(self, game_map):
-        if not self.speed_set:
-            self.speed = 20
-            self.speed_set = True
-
-        self.rotated_sprite = self.rotate_center(self.sprite, self.angle)
-        self.position[0] += math.cos(math.radians(360 - self.angle)) * self.speed
-        self.position[1] += math.sin(math.radians(360 - self.angle)) * self.speed
-
-        self.position[0] = max(self.position[0], 20)
-        self.position[0] = min(self.position[0], WIDTH - 120)
-        self.position[1] = max(self.position[1], 20)
-        self.position[1] = min(self.position[1], HEIGHT - 120)
-
-        self.distance += self.speed
-        self.time += 1
-        self.center = [self.position[0] + CAR_SIZE_X / 2, self.position[1] + CAR_SIZE_Y / 2]
-        
-        l = 0.5 * CAR_SIZE_X
-        self.corners = [
-            [self.center[0] + math.cos(math.radians(360 - (self.angle + a))) * l,
-             self.center[1] + math.sin(math.radians(360 - (self.angle + a))) * l]
-            for a in [30, 150, 210, 330]
-        ]
-        
-        dx = self.center[0] - START_POS[0]
-        dy = self.center[1] - START_POS[1]
-        dist = math.hypot(dx, dy)
-
-        if dist < LAP_ZONE_RADIUS:
-            if not self.lap_completed:
-                now = pygame.time.get_ticks()
-                if self.last_lap_time is not None:
-                    lap_time = (now - self.last_lap_time) / 1000.0  # sekundy
-                    self.lap_times.append(lap_time)
-                self.last_lap_time = now
-                self.lap_completed = True
-        else:
-            self.lap_completed = False
-
-        self.check_collision(game_map)
-        self.radars.clear()
-        for d in [-120, -90, -60, -30, 0, 30, 60, 90, 120]:
-            self.check_radar(d, game_map)
-
-    def get_data(self):
-        radars = self.radars
-        return_values = [0, 0, 0, 0, 0, 0, 0, 0, 0]
-        for i, radar in enumerate(radars):
-            return_values[i] = int(radar[1] / 30)
-
-        return return_values
-
-    def get_reward(self):
-        return self.distance / (CAR_SIZE_X / 2)
-
-    def rotate_center(self, image, angle):
-        rect = image.get_rect()
-        rotated_image = pygame.transform.rotate(image, angle)
-        rot_rect = rect.copy()
-        rot_rect.center = rotated_image.get_rect().center
-        return rotated_image.subsurface(rot_rect).copy()
-
-def run_simulation(genomes, config):
-    global current_generation
-    current_generation += 1
-
-    nets = []
-    cars = []
-
-    pygame.init()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont("Arial", 30)
-    button_font = pygame.font.SysFont("Arial", 24)
-    exit_button = pygame.Rect(WIDTH - 160, 20, 140, 40)
-    game_map = pygame.image.load(os.path.join("maps", selected_track)).convert()
-
-    for genome_id, genome in genomes:
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
-        nets.append(net)
-        genome.fitness = 0
-        cars.append(Car(selected_car))
-
-    counter = 0
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if exit_button.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
+#odswiezanie okna podgladu, niezalezne od tempa symulacji
+FPS = 60
 
-        for i, car in enumerate(cars):
-            if car.alive:
-                output = nets[i].activate(car.get_data())
-                choice = output.index(max(output))
-                if choice == 0:
-                    car.angle += 10
-                elif choice == 1:
-                    car.angle -= 10
-                elif choice == 2:
-                    if car.speed - 2 >= 12:
-                        car.speed -= 2
-                else:
-                    car.speed += 2
-
-        still_alive = 0
-        for i, car in enumerate(cars):
-            if car.alive:
-                still_alive += 1
-                car.update(game_map)
-                genomes[i][1].fitness += car.get_reward()
-
-        if still_alive == 0 or counter > 60 * 30:
-            pygame.display.flip()
-            pygame.time.delay(1000)
-            break
-
-        screen.blit(game_map, (0, 0))
-        for car in cars:
-            if car.alive:
-                car.draw(screen)
-
-        avg_fitness = sum(g.fitness for _, g in genomes) / len(genomes)
-        best_fitness = max(g.fitness for _, g in genomes)
-        top_speed = max([car.speed for car in cars if car.alive], default=0)
-        
-        if START_ORIENTATION == 'vertical':
-            pygame.draw.line(screen, START_LINE_COLOR,
-                            (START_POS[0], START_POS[1] - START_LINE_WIDTH),
-                            (START_POS[0], START_POS[1] + START_LINE_WIDTH), 6)
-        else:
-            pygame.draw.line(screen, START_LINE_COLOR,
-                            (START_POS[0] - START_LINE_WIDTH, START_POS[1]),
-                            (START_POS[0] + START_LINE_WIDTH, START_POS[1]), 6)
-            
-        fastest_lap = min((min(car.lap_times) for car in cars if car.lap_times), default=None)
+#wybor z menu; czytany dopiero przy starcie treningu, zeby import modulu (bench.py) go nie wymagal
+def load_selection():
+    with open("selected.json") as f:
+        data = json.load(f)
+    selected = data.get("track"), data.get("car"), data.get("config")
+    if not all(selected):
+        print("Error: Nie wybrano trasy, samochodu lub konfiguracji")
+        sys.exit(1)
+    return selected
+
+#jedna sesja na caly pop.run: okno, czcionki, trasy i sprite'y tworzone raz,
+#kazda generacja zaklada tylko nowy PopulationState na kazdej trasie z programu (Curriculum);
+#z live (LiveState) ogladane generacje zostawiaja kopie stanu dla okna w glownym watku
+class Session:
+    def __init__(self, curriculum, car_file, headless=False, watch_every=0,
+                 stall_window=STALL_WINDOW, stall_ratio=STALL_RATIO, generation=0,
+                 record_dir=None, record_every=1, cache=None, render_every=1, radar_top=-1, live=None):
+        pygame.init()
+        self.curriculum = curriculum
+        self.tracks = {name: load_track(os.path.join("maps", name)) for name in curriculum.track_files}
+        self.car_file = car_file
+        self.headless = headless
+        self.watch_every = watch_every
+        self.stall_window = stall_window
+        self.stall_ratio = stall_ratio
+        self.generation = generation
+        self.record_dir = record_dir
+        self.record_every = record_every
+        self.cache = cache or FitnessCache(0, stall_window, stall_ratio)
+        self.render_every = render_every
+        self.radar_top = radar_top
+        self.live = live
+        self.screen = None
+        self.profile = None
+
+    def should_render(self):
+        if self.live is None:
+            return False
+        if not self.headless:
+            return True
+        return self.watch_every > 0 and self.generation % self.watch_every == 0
+
+    def should_record(self):
+        return self.record_dir is not None and self.generation % self.record_every == 0
+
+    def open_window(self):
+        if self.screen is not None:
+            return
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont("Arial", 30)
+        self.button_font = pygame.font.SysFont("Arial", 24)
+        self.exit_button = pygame.Rect(WIDTH - 160, 20, 140, 40)
+        self.atlas = load_sprite_atlas(self.car_file, (CAR_SIZE_X, CAR_SIZE_Y))
+        self.hud = {}
+
+    #wszystkie sprite'y jednym blits; auta nalozone na siebie (ten sam piksel i ta sama
+    #klatka obrotu, np. cala populacja na starcie) wygladaja jak jedno, wiec rysujemy je raz
+    def draw_cars(self, state):
+        alive = np.flatnonzero(state.alive)
+        x = state.x[alive]
+        y = state.y[alive]
+        frame = np.round(state.angle[alive] / ROTATION_STEP).astype(np.int64) % len(self.atlas)
+        keys = (x.astype(np.int64) * HEIGHT + y.astype(np.int64)) * len(self.atlas) + frame
+        first = np.sort(np.unique(keys, return_index=True)[1])
+        atlas = self.atlas
+        self.screen.blits([(atlas[k], (px, py)) for k, px, py in
+                           zip(frame[first].tolist(), x[first].tolist(), y[first].tolist())], doreturn=False)
+
+    #radary tylko dla radar_top aut z najwyzszym fitness (-1 = wszystkie zywe)
+    def draw_radars(self, state):
+        alive = np.flatnonzero(state.alive)
+        if self.radar_top >= 0:
+            alive = alive[np.argsort(-state.fitness[alive], kind="stable")[:self.radar_top]]
+        screen = self.screen
+        for i in alive.tolist():
+            center = (state.center_x[i], state.center_y[i])
+            for pos in zip(state.radar_x[i].tolist(), state.radar_y[i].tolist()):
+                pygame.draw.line(screen, (0, 0, 255), center, pos, 1)
+                pygame.draw.circle(screen, (0, 0, 255), pos, 5)
+
+    #napis renderowany od nowa tylko, gdy zmieni sie jego tresc
+    def draw_text(self, line, text):
+        cached = self.hud.get(line)
+        if cached is None or cached[0] != text:
+            cached = (text, self.font.render(text, True, (0, 0, 0)))
+            self.hud[line] = cached
+        self.screen.blit(cached[1], (20, 0 + line * 30))
+
+    def draw_frame(self, state, still_alive, generation, status=()):
+        screen = self.screen
+        screen.blit(state.track.surface, (0, 0))
+        self.draw_cars(state)
+        self.draw_radars(state)
+
+        avg_fitness = state.fitness.mean()
+        best_fitness = state.fitness.max()
+        top_speed = state.speed[state.alive].max(initial=0)
+
+        pygame.draw.line(screen, START_LINE_COLOR, *state.track.start_line, 6)
+
+        fastest_lap = state.fastest_lap
 
         extra_stats = [
-            f"Generacja: {current_generation}",
+            f"Generacja: {generation}",
             f"Liczba aut: {still_alive}",
             f"Średni Fitness: {avg_fitness:.2f}",
             f"Najlepszy Fitness: {best_fitness:.2f}",
             f"Największa predkość: {top_speed:.1f}",
-            f"Naj. Okrążenie: {fastest_lap:.2f}s" if fastest_lap is not None else "Naj. Okrążenie: N/A"
+            f"Naj. Okrążenie: {fastest_lap:.2f}s" if fastest_lap is not None else "Naj. Okrążenie: N/A",
+            *status
         ]
 
         for i, stat in enumerate(extra_stats):
-            stat_surface = font.render(stat, True, (0, 0, 0))
-            screen.blit(stat_surface, (20, 0 + i * 30))
+            self.draw_text(i, stat)
 
-        pygame.draw.rect(screen, (200, 0, 0), exit_button)
-        exit_text = button_font.render("Zakończ", True, (255, 255, 255))
+        pygame.draw.rect(screen, (200, 0, 0), self.exit_button)
+        exit_text = self.button_font.render("Zakończ", True, (255, 255, 255))
         screen.blit(exit_text, (WIDTH - 150, 30))
 
         pygame.display.flip()
-        clock.tick(120)
-        counter += 1
-    
-    
+
+    def run_simulation(self, genomes, config):
+        self.generation += 1
+        nets = [compile_genome(genome, config) for _, genome in genomes]
+        net_keys = [net_hash(net) for net in nets]
+        spec = car_spec(config)
+        for genome_id, genome in genomes:
+            genome.fitness = 0
+
+        #obserwowana albo nagrywana generacja jedzie w komplecie, inaczej tylko genomy spoza cache
+        render = self.should_render()
+        record = self.should_record()
+        hits = self.cache.hits
+        scores = []
+        profiles = []
+        for track_file in self.curriculum.tracks:
+            keys = [self.cache.key(net_key, self.tracks[track_file], spec) for net_key in net_keys]
+            results, groups = self.cache.partition(keys, lookup=not (render or record))
+            if groups:
+                batch = BatchNetwork([nets[group[0]] for group in groups])
+                state, profile = self.run_track(track_file, batch, render, record, spec)
+                profiles.append(profile)
+                self.cache.fill(keys, results, groups, [(float(state.fitness[i]), list(state.lap_times[i]))
+                                                        for i in range(len(groups))])
+            scores.append([fitness for fitness, laps in results])
+        self.profile = merge_profiles(profiles, concurrent=False)
+        self.profile["cache_hits"] = self.cache.hits - hits
+
+        fitness = self.curriculum.aggregate(scores)
+        for i, (genome_id, genome) in enumerate(genomes):
+            genome.fitness = float(fitness[i])
+        self.curriculum.update(fitness)
+
+    def run_track(self, track_file, nets, render, record, spec):
+        count = nets.count
+        state = PopulationState(count, self.tracks[track_file], self.stall_window, self.stall_ratio, spec)
+        profile = TickProfile(state, nets)
+        on_tick = None
+        if render:
+            live = self.live
+
+            #kopia stanu co render_every-ty tick (o ile okno zabralo poprzednia), rysuje glowny watek
+            def publish(state, still_alive):
+                if state.tick % self.render_every == 0:
+                    live.publish(state, still_alive, self.generation)
+            #pauza i limit tempa to nie rysowanie - w telemetrii osobno jako wait
+            publish = profile.wrap_on_tick(publish)
+            throttle = profile.wrap_wait(live.throttle)
+
+            def on_tick(state, still_alive):
+                publish(state, still_alive)
+                throttle(state.tick)
+
+        recorder = None
+        if record:
+            recorder = ReplayRecorder(replay_path(self.record_dir, self.generation, track_file), count,
+                                      state.track.png_path, self.generation, self.car_file)
+        rollout(state, nets, on_tick, recorder)
+        if recorder is not None:
+            recorder.close()
+        return state, profile.summary()
+
+    def status_lines(self, live):
+        speed = "bez limitu" if live.speed is None else f"x{live.speed:g}"
+        lines = [f"Tempo: {speed}"]
+        if live.paused:
+            lines.append("Pauza")
+        if live.stop:
+            lines.append("Koniec po tej generacji")
+        return lines
+
+    #zamkniecie okna, Esc i "Zakończ" - checkpoint i koniec po biezacej generacji, drugi raz -
+    #od razu; spacja - pauza, gora/dol - tempo, S - checkpoint po biezacej generacji
+    def handle_events(self, live):
+        for event in pygame.event.get():
+            stop = (event.type == pygame.QUIT
+                    or event.type == pygame.MOUSEBUTTONDOWN and self.exit_button.collidepoint(event.pos)
+                    or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)
+            if stop:
+                if live.stop:
+                    pygame.quit()
+                    sys.exit()
+                live.request_stop()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    live.toggle_pause()
+                elif event.key == pygame.K_UP:
+                    live.change_speed(1)
+                elif event.key == pygame.K_DOWN:
+                    live.change_speed(-1)
+                elif event.key == pygame.K_s:
+                    live.save = True
+
+    #petla okna w glownym watku, dopoki trwa trening; okno otwiera sie z pierwsza kopia stanu
+    def present(self, live, training):
+        snapshot = None
+        while training.is_alive():
+            snapshot = live.take() or snapshot
+            if snapshot is None:
+                training.join(1 / FPS)
+                continue
+            self.open_window()
+            self.handle_events(live)
+            self.draw_frame(snapshot, snapshot.still_alive, snapshot.generation, self.status_lines(live))
+            self.clock.tick(FPS)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Trening NEAT")
+    parser.add_argument("--headless", action="store_true",
+                        help="trening bez okna, limitu klatek i opoznien")
+    parser.add_argument("--watch-every", type=int, default=0, metavar="N",
+                        help="w trybie --headless pokazuj co N-ta generacje")
+    parser.add_argument("--render-every", type=int, default=1, metavar="N",
+                        help="pokazuj co N-ty tick ogladanej generacji")
+    parser.add_argument("--speed", type=float, default=None, choices=[s for s in SPEEDS if s],
+                        help="tempo ogladanej generacji jako wielokrotnosc czasu rzeczywistego (domyslnie bez limitu)")
+    parser.add_argument("--radar-top", type=int, default=-1, metavar="K",
+                        help="rysuj radary tylko K najlepszych aut (-1 = wszystkich)")
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--stall-window", type=int, default=STALL_WINDOW, metavar="TICKI",
+                        help="odrzucaj auta krecace sie w miejscu przez tyle tickow (0 = wylaczone)")
+    parser.add_argument("--stall-ratio", type=float, default=STALL_RATIO,
+                        help="minimalne przesuniecie w oknie jako czesc przejechanej drogi")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="ziarno losowania NEAT - ten sam seed daje ten sam trening")
+    parser.add_argument("--workers", type=int, default=0, metavar="N",
+                        help="ocena genomow w N procesach (wymusza --headless)")
+    parser.add_argument("--remote-workers", nargs="+", default=None, metavar="ADRES",
+                        help="ocena na procesach roboczych remote.py pod tymi adresami (host:port albo gniazdo)")
+    parser.add_argument("--worker-timeout", type=float, default=WORKER_TIMEOUT, metavar="SEKUNDY",
+                        help="po tylu sekundach ciszy proces roboczy uznajemy za martwy")
+    parser.add_argument("--checkpoint-dir", default="checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=5, metavar="N",
+                        help="checkpoint co N generacji")
+    parser.add_argument("--checkpoint-seconds", type=float, default=None,
+                        help="dodatkowo checkpoint co tyle sekund")
+    parser.add_argument("--record-dir", default=None,
+                        help="zapisuj powtorki generacji do tego katalogu (odtwarzanie: viewer.py)")
+    parser.add_argument("--record-every", type=int, default=1, metavar="N",
+                        help="z --record-dir zapisuj co N-ta generacje")
+    parser.add_argument("--tracks", nargs="+", default=None, metavar="TRASA",
+                        help="ocena na kilku trasach naraz ('all' = wszystkie z maps/), domyslnie trasa z selected.json")
+    parser.add_argument("--track-fitness", choices=FITNESS_MODES, default="mean",
+                        help="jak laczyc fitness z wielu tras")
+    parser.add_argument("--curriculum-threshold", type=float, default=None,
+                        help="w trybie curriculum: fitness, po ktorym dochodzi kolejna trasa")
+    parser.add_argument("--fitness-cache", type=int, default=CACHE_SIZE, metavar="N",
+                        help="pamietaj wyniki tylu sieci (elity nie jada ponownie, 0 = wylaczone)")
+    parser.add_argument("--telemetry", metavar="PLIK", default=None,
+                        help="dopisuj statystyki kazdej generacji jako linie JSON")
+    parser.add_argument("--champion", metavar="PLIK", default=None,
+                        help="gdzie zapisac najlepszego kierowce (domyslnie champion.npz w --checkpoint-dir)")
+    parser.add_argument("--resume", metavar="PLIK",
+                        help="wznow z checkpointu; 'latest' = najnowszy w --checkpoint-dir (albo start od zera)")
+    args = parser.parse_args()
+    #procesy robocze zapisalyby powtorki we wlasnym katalogu roboczym, na innej maszynie
+    if args.record_dir and args.remote_workers:
+        parser.error("--record-dir nie dziala z --remote-workers (powtorki zostalyby na maszynach roboczych)")
+    return args
 
 if __name__ == "__main__":
-    ini_config = load_neat_config(selected_config)
-    config = neat.config.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
-        ini_config
-    )
-
-    pop = neat.Population(config)
+    args = parse_args()
+    selected_track, selected_car, selected_config = load_selection()
+    distributed = args.workers > 0 or bool(args.remote_workers)
+    headless = args.headless or distributed
+    if headless and args.watch_every == 0:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    config = load_config(selected_config)
+
+    checkpoint = latest_checkpoint(args.checkpoint_dir) if args.resume == "latest" else args.resume
+    if checkpoint:
+        pop = restore_checkpoint(checkpoint)
+        print(f"Wznowiono z {checkpoint} (generacja {pop.generation})")
+    else:
+        archive = archive_run(args.checkpoint_dir)
+        if archive:
+            print(f"Poprzedni trening przeniesiono do {archive}")
+        pop = neat.Population(config)
+
     pop.add_reporter(neat.StdOutReporter(True))
     pop.add_reporter(neat.StatisticsReporter())
-    pop.run(run_simulation, 100)
-    os.remove(ini_config)
+    checkpointer = AtomicCheckpointer(args.checkpoint_dir, args.checkpoint_every, args.checkpoint_seconds)
+    pop.add_reporter(checkpointer)
+    best_path = os.path.join(args.checkpoint_dir, "best_genome.pkl")
+    pop.add_reporter(BestGenomeReporter(best_path))
+
+    #--generations to docelowa liczba generacji, takze po wznowieniu
+    remaining = max(0, args.generations - pop.generation)
+    curriculum = Curriculum(resolve_tracks(args.tracks or [selected_track]),
+                            args.track_fitness, args.curriculum_threshold)
+    cache = FitnessCache(args.fitness_cache, args.stall_window, args.stall_ratio)
+    live = None
+    if args.remote_workers:
+        evaluator = RemoteEvaluator(args.remote_workers, curriculum,
+                                    args.stall_window, args.stall_ratio, pop.generation,
+                                    args.record_dir, args.record_every, selected_car, cache,
+                                    timeout=args.worker_timeout)
+        fitness_function = evaluator.evaluate
+    elif args.workers > 0:
+        evaluator = ParallelEvaluator(args.workers, curriculum,
+                                      args.stall_window, args.stall_ratio, pop.generation,
+                                      args.record_dir, args.record_every, selected_car, cache)
+        fitness_function = evaluator.evaluate
+    else:
+        #okno (takze tylko dla co N-tej generacji) dziala w glownym watku, trening w osobnym
+        live = LiveState(args.speed) if not headless or args.watch_every > 0 else None
+        evaluator = Session(curriculum, selected_car, headless, args.watch_every,
+                            args.stall_window, args.stall_ratio, pop.generation,
+                            args.record_dir, args.record_every, cache, args.render_every, args.radar_top, live)
+        fitness_function = evaluator.run_simulation
+        if live is not None:
+            pop.add_reporter(ControlReporter(live, checkpointer))
+    if args.telemetry:
+        pop.add_reporter(TelemetryReporter(args.telemetry, evaluator))
+
+    def train():
+        try:
+            pop.run(fitness_function, remaining)
+        except StopTraining:
+            print(f"Trening zatrzymany po generacji {pop.generation}")
+
+    try:
+        if live is None:
+            train()
+        else:
+            errors = []
+
+            def run_training():
+                try:
+                    train()
+                except BaseException as e:
+                    errors.append(e)
+            #daemon - drugie "Zakończ" konczy proces bez czekania na generacje
+            training = threading.Thread(target=run_training, daemon=True)
+            training.start()
+            evaluator.present(live, training)
+            training.join()
+            if errors:
+                raise errors[0]
+    finally:
+        if distributed:
+            evaluator.close()
+
+    #najlepszy genom calego treningu jako samodzielny kierowca (driver.py)
+    if os.path.exists(best_path):
+        best = load_best_genome(best_path)
+        champion = export_champion(best["genome"], config, args.champion or os.path.join(args.checkpoint_dir, "champion.npz"),
+                                   generation=best["generation"], config_file=selected_config)
+        print(f"Zapisano kierowce: {champion}")
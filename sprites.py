@@ -0,0 +1,29 @@
+import pygame
+
+#sprite'y aut wspolne dla treningu, podgladu i powtorek - bez reszty simulation.py
+
+ROTATION_STEP = 10
+sprite_atlases = {}
+
+def load_sprite(sprite_file, size):
+    sprite = pygame.image.load(f"assets/{sprite_file}")
+    if pygame.display.get_surface() is not None:
+        sprite = sprite.convert()
+    return pygame.transform.scale(sprite, size)
+
+def rotate_center(image, angle):
+    rect = image.get_rect()
+    rotated_image = pygame.transform.rotate(image, angle)
+    rot_rect = rect.copy()
+    rot_rect.center = rotated_image.get_rect().center
+    return rotated_image.subsurface(rot_rect).copy()
+
+#skret zmienia kat co ROTATION_STEP stopni, wiec wszystkie obrocone sprite'y liczymy raz
+#na plik; size - rozmiar auta (engine.CAR_SIZE_X, CAR_SIZE_Y)
+def load_sprite_atlas(sprite_file, size):
+    atlas = sprite_atlases.get((sprite_file, size))
+    if atlas is None:
+        sprite = load_sprite(sprite_file, size)
+        atlas = [rotate_center(sprite, i * ROTATION_STEP) for i in range(360 // ROTATION_STEP)]
+        sprite_atlases[sprite_file, size] = atlas
+    return atlas
@@ -0,0 +1,94 @@
+import sys
+import time
+import numpy as np
+from engine import TICKS_PER_SECOND
+#modul resource jest tylko na Uniksie - na Windows telemetria zapisuje 0 zamiast szczytowej pamieci
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PHASES = ["sensing", "inference", "physics", "render"]
+
+def timed(phases, name, func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        phases[name] += time.perf_counter() - start
+        return result
+    return wrapper
+
+#szczytowe RSS procesu w MB (ru_maxrss to KB na Linuksie, bajty na macOS)
+def peak_rss_mb():
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+#pomiar jednego przejazdu: czas etapow ticka i liczba zywych aut co sekunde symulacji;
+#metody stanu i sieci podmieniamy na mierzone, sam rollout zostaje bez zmian,
+#a summary() oddaje sieci oryginalne choose (te same sieci jada potem po innej trasie)
+class TickProfile:
+    def __init__(self, state, nets):
+        self.state = state
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        #czekanie na okno (pauza, --speed) poza etapami ticka
+        self.waits = {"wait": 0.0}
+        self.alive = [int(state.alive.sum())]
+        self.nets = nets
+        self.choose = nets.choose
+        state.check_radars = timed(self.phases, "sensing", state.check_radars)
+        nets.choose = timed(self.phases, "inference", nets.choose)
+        step = timed(self.phases, "physics", state.step)
+
+        def counted_step():
+            still_alive = step()
+            if state.tick % TICKS_PER_SECOND == 0:
+                self.alive.append(int(state.alive.sum()))
+            return still_alive
+        state.step = counted_step
+        self.start = time.perf_counter()
+
+    def wrap_on_tick(self, on_tick):
+        return timed(self.phases, "render", on_tick) if on_tick is not None else None
+
+    def wrap_wait(self, func):
+        return timed(self.waits, "wait", func)
+
+    def summary(self):
+        state = self.state
+        self.nets.choose = self.choose
+        phases = dict(self.phases)
+        #physics to krok bez czujnikow
+        phases["physics"] -= phases["sensing"]
+        if state.tick % TICKS_PER_SECOND:
+            self.alive.append(int(state.alive.sum()))
+        return {
+            "rollout_time": time.perf_counter() - self.start,
+            "wait_time": self.waits["wait"],
+            "ticks": state.tick,
+            "car_ticks": int(state.time.sum()),
+            "phases": phases,
+            "alive": self.alive,
+            "fastest_lap": min((min(laps) for laps in state.lap_times if laps), default=None),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+#profile czesci populacji (albo tras) jako jeden wynik generacji; concurrent - czesci liczone
+#w osobnych procesach naraz, wiec czas przejazdu to najdluzsza z nich, a nie suma
+def merge_profiles(profiles, concurrent=True):
+    alive = np.zeros(max((len(p["alive"]) for p in profiles), default=0), dtype=np.int64)
+    for p in profiles:
+        alive[:len(p["alive"])] += p["alive"]
+    laps = [p["fastest_lap"] for p in profiles if p["fastest_lap"] is not None]
+    return {
+        "rollout_time": max((p["rollout_time"] for p in profiles), default=0.0) if concurrent
+                        else sum(p["rollout_time"] for p in profiles),
+        "wait_time": sum(p["wait_time"] for p in profiles),
+        "ticks": max((p["ticks"] for p in profiles), default=0),
+        "car_ticks": sum(p["car_ticks"] for p in profiles),
+        "phases": {name: sum(p["phases"][name] for p in profiles) for name in PHASES},
+        "alive": alive.tolist(),
+        "fastest_lap": min(laps, default=None),
+        "peak_rss_mb": max((p["peak_rss_mb"] for p in profiles), default=0.0),
+    }
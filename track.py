@@ -0,0 +1,402 @@
+import os
+import json
+import heapq
+import hashlib
+import pygame
+import numpy as np
+from engine import START_POS, CAR_SIZE_X, CAR_SIZE_Y, CORNER_ANGLES
+from sensors import RADAR_RANGE
+
+BORDER_COLOR = (255, 255, 255, 255)
+#odleglosc liczymy tylko do tego progu, dalej i tak skaczemy co najwyzej o tyle
+DIST_CAP = 64
+#po tylu skokach reszte promieni (zwykle wzdluz sciany) konczymy probkujac naraz wszystkie dlugosci
+SPHERE_STEPS = 10
+CACHE_DIR = os.path.join("maps", "cache")
+CACHE_FORMAT = 4
+HEADER_SIZE = 4096
+VECTOR_FORMAT = 1
+#bok komorki siatki postepu w pikselach
+PROGRESS_CELL = 4
+#kat auta (jak w engine: 0 to +x, 90 to -y na ekranie) -> kierunek jazdy ze startu
+HEADINGS = {0: (1, 0), 90: (0, -1), 180: (-1, 0), 270: (0, 1)}
+#kolejnosc prob dla orientacji linii startu z edytora - pionowa linia to jazda w poziomie
+START_HEADINGS = {"vertical": (0, 180, 270, 90), "horizontal": (270, 90, 0, 180)}
+#kierunek startu musi miec przed soba tyle wolnej drogi, inaczej bierzemy ten z najdluzsza
+MIN_START_RUN = 2 * CAR_SIZE_X
+
+#maska scian: biale piksele trasy (tak jak BORDER_COLOR), indeksowana [x, y] jak get_at
+def wall_mask(surface):
+    rgb = pygame.surfarray.array3d(surface)
+    wall = np.all(rgb == BORDER_COLOR[:3], axis=2)
+    #ramka obrazu jest sciana, zeby radar nigdy nie wyszedl poza mape
+    wall[0, :] = wall[-1, :] = True
+    wall[:, 0] = wall[:, -1] = True
+    return wall
+
+#euklidesowa odleglosc kazdego piksela od najblizszej sciany, obcieta do DIST_CAP
+def distance_field(wall, cap=DIST_CAP):
+    w, h = wall.shape
+    big = cap + 1
+    #przebieg po kolumnach: odleglosc do sciany w tej samej kolumnie
+    idx = np.arange(h)
+    prev_wall = np.where(wall, idx, -big * 4)
+    np.maximum.accumulate(prev_wall, axis=1, out=prev_wall)
+    next_wall = np.where(wall, idx, h + big * 4)[:, ::-1]
+    next_wall = np.minimum.accumulate(next_wall, axis=1)[:, ::-1]
+    col = np.minimum(idx - prev_wall, next_wall - idx)
+    col = np.minimum(col, big).astype(np.float32)
+    col2 = col * col
+
+    #przebieg po wierszach: minimum z (dx^2 + kolumna^2) w oknie +-cap
+    d2 = col2.copy()
+    for k in range(1, big):
+        kk = np.float32(k * k)
+        np.minimum(d2[k:], col2[:-k] + kk, out=d2[k:])
+        np.minimum(d2[:-k], col2[k:] + kk, out=d2[:-k])
+    return np.minimum(np.sqrt(d2), cap).astype(np.float32)
+
+#czy auta o srodkach (cx, cy) i kacie angle mieszcza sie na drodze - rogi jak w check_collision
+def car_fits(wall, cx, cy, angle):
+    l = 0.5 * CAR_SIZE_X
+    rad = np.radians(360 - (angle + np.array(CORNER_ANGLES)))
+    cx = np.asarray(cx, dtype=np.float64)[..., None]
+    cy = np.asarray(cy, dtype=np.float64)[..., None]
+    px = np.concatenate([(cx + np.cos(rad) * l).astype(np.int64), cx.astype(np.int64)], axis=-1)
+    py = np.concatenate([(cy + np.sin(rad) * l).astype(np.int64), cy.astype(np.int64)], axis=-1)
+    w, h = wall.shape
+    inside = ((px >= 0) & (px < w) & (py >= 0) & (py < h)).all(axis=-1)
+    return inside & ~wall[np.clip(px, 0, w - 1), np.clip(py, 0, h - 1)].any(axis=-1)
+
+#ile pikseli drogi jest przed srodkiem auta w kierunku angle (najwyzej limit)
+def free_run(wall, cx, cy, angle, limit=RADAR_RANGE):
+    dx, dy = HEADINGS[angle]
+    steps = np.arange(1, limit + 1)
+    px = np.clip(int(cx) + dx * steps, 0, wall.shape[0] - 1)
+    py = np.clip(int(cy) + dy * steps, 0, wall.shape[1] - 1)
+    hit = np.flatnonzero(wall[px, py])
+    return int(hit[0]) if len(hit) else limit
+
+#miejsce i kat startu: start z edytora (albo engine.START_POS), jesli auto sie tam miesci, inaczej
+#najblizszy punkt, w ktorym miesci sie pod ktoryms z katow (np. PNG bez drogi pod domyslnym startem);
+#kierunek to pierwszy z kolejnosci dla orientacji linii, ktory ma przed soba dosc drogi
+def place_start(wall, field, start_pos, orientation="vertical"):
+    preferred = START_HEADINGS.get(orientation, START_HEADINGS["vertical"])
+    cx, cy = start_pos[0] + CAR_SIZE_X / 2, start_pos[1] + CAR_SIZE_Y / 2
+    if not any(car_fits(wall, cx, cy, angle) for angle in preferred):
+        #rogi auta sa 12.5 piksela od jego osi, wiec wezsze miejsca nie wchodza w gre
+        spots = np.argwhere(field > CAR_SIZE_Y / 4)
+        spots = spots[np.argsort((spots[:, 0] - cx) ** 2 + (spots[:, 1] - cy) ** 2, kind="stable")]
+        fits = np.zeros(len(spots), dtype=bool)
+        for angle in preferred:
+            fits |= car_fits(wall, spots[:, 0], spots[:, 1], angle)
+        if not fits.any():
+            raise ValueError("Na trasie nie ma miejsca na auto")
+        cx, cy = map(float, spots[np.argmax(fits)])
+    runs = {angle: free_run(wall, cx, cy, angle) for angle in preferred if car_fits(wall, cx, cy, angle)}
+    angle = next((a for a in preferred if runs.get(a, 0) >= MIN_START_RUN), None)
+    if angle is None:
+        angle = max(runs, key=runs.get)
+    return [int(cx - CAR_SIZE_X / 2), int(cy - CAR_SIZE_Y / 2)], angle
+
+#obrot siatki [x, y] tak, zeby kierunek startu angle wypadl w strone +x (inverse - z powrotem)
+def turn_grid(grid, angle, inverse=False):
+    if angle == 180:
+        return grid[::-1]
+    if angle == 270:
+        return grid.T
+    if angle == 90:
+        return grid[::-1].T if inverse else grid.T[::-1]
+    return grid
+
+#to samo dla jednej komorki; shape to wymiary siatki przed obrotem
+def turn_cell(x, y, shape, angle, inverse=False):
+    w, h = shape
+    if angle == 180:
+        return w - 1 - x, y
+    if angle == 270:
+        return y, x
+    if angle == 90:
+        return (y, h - 1 - x) if inverse else (h - 1 - y, x)
+    return x, y
+
+#postep wzdluz trasy: najkrotsza droga po drodze (siatka co cell pikseli, 8 sasiadow) od linii
+#startu, ktora dla przejazdu jest zablokowana - auta ruszaja w kierunku angle, wiec do komorek za
+#linia dojezdza sie dopiero dookola; lap_length to droga do komorek tuz przed linia, -1 to sciana.
+#Linia jest prostopadla do kierunku startu i przechodzi przez punkt cut (tyl auta); liczymy na
+#siatce obroconej tak, zeby start byl w strone +x. Zwraca tez konce linii w pikselach
+def progress_grid(wall, cut, angle=0, cell=PROGRESS_CELL):
+    w, h = wall.shape
+    shape = (w // cell, h // cell)
+    road = turn_grid(~wall[cell // 2::cell, cell // 2::cell][:shape[0], :shape[1]], angle)
+    gw, gh = road.shape
+    sx, sy = turn_cell(cut[0] // cell, cut[1] // cell, shape, angle)
+    #tyl auta moze wypasc na scianie tuz za nim - linia przesuwa sie wtedy do przodu
+    for _ in range(CAR_SIZE_X // cell):
+        if not (0 <= sx < gw - 1 and 0 <= sy < gh) or road[sx, sy]:
+            break
+        sx += 1
+    if not (0 < sx < gw - 1 and 0 <= sy < gh and road[sx, sy]):
+        raise ValueError(f"Start trasy poza droga: {tuple(cut)}")
+    #linia startu: ciagly odcinek drogi w kolumnie startu
+    top = bottom = sy
+    while top > 0 and road[sx, top - 1]:
+        top -= 1
+    while bottom < gh - 1 and road[sx, bottom + 1]:
+        bottom += 1
+    blocked = (~road).tolist()
+    for y in range(top, bottom + 1):
+        blocked[sx][y] = True
+
+    #Dijkstra na listach - na siatce tras (~500x270) szybciej niz na tablicach numpy
+    dist = [[float("inf")] * gh for _ in range(gw)]
+    heap = []
+    for y in range(top, bottom + 1):
+        if not blocked[sx + 1][y]:
+            dist[sx + 1][y] = float(cell)
+            heap.append((float(cell), sx + 1, y))
+    heapq.heapify(heap)
+    steps = [(dx, dy, cell * (2 ** 0.5 if dx and dy else 1.0))
+             for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+    while heap:
+        d, x, y = heapq.heappop(heap)
+        if d > dist[x][y]:
+            continue
+        for dx, dy, cost in steps:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < gw and 0 <= ny < gh and not blocked[nx][ny] and d + cost < dist[nx][ny]:
+                dist[nx][ny] = d + cost
+                heapq.heappush(heap, (d + cost, nx, ny))
+
+    dist = np.array(dist)
+    reached = np.isfinite(dist)
+    before = dist[sx - 1, top:bottom + 1]
+    before = before[np.isfinite(before)]
+    #trasa bez petli: okrazeniem jest dojechanie do najdalszego punktu
+    lap_length = float(before.min() + cell) if len(before) else float(dist[reached].max(initial=cell))
+    grid = np.where(reached, dist, -1.0)
+    grid[sx, top:bottom + 1] = 0.0
+    line = [turn_cell(sx, y, shape, angle, inverse=True) for y in (top, bottom)]
+    line = [[x * cell + cell // 2, y * cell + cell // 2] for x, y in line]
+    return np.ascontiguousarray(turn_grid(grid, angle, inverse=True), dtype=np.float32), lap_length, line
+
+#opis wektorowy z edytora obok PNG: kreski jako linie lamane z promieniem pedzla
+def vector_path(png_path):
+    return os.path.splitext(png_path)[0] + ".json"
+
+def load_vector(png_path):
+    path = vector_path(png_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        vector = json.load(f)
+    if vector.get("format") != VECTOR_FORMAT:
+        raise ValueError(f"Nieobslugiwany format trasy wektorowej: {path}")
+    return vector
+
+#fragment drogi jednego odcinka kreski: piksele (srodki w punktach calkowitych) w odleglosci
+#najwyzej radius od odcinka p0-p1; ten sam raster rysuje edytor i buduje cache trasy
+def segment_patch(p0, p1, radius, width, height):
+    (ax, ay), (bx, by) = p0, p1
+    x0 = max(0, int(np.floor(min(ax, bx) - radius)))
+    y0 = max(0, int(np.floor(min(ay, by) - radius)))
+    x1 = min(width, int(np.ceil(max(ax, bx) + radius)) + 1)
+    y1 = min(height, int(np.ceil(max(ay, by) + radius)) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return x0, y0, np.zeros((0, 0), dtype=bool)
+    px = np.arange(x0, x1, dtype=np.float64)[:, None] - ax
+    py = np.arange(y0, y1, dtype=np.float64)[None, :] - ay
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0) if length2 else 0.0
+    ex = px - t * dx
+    ey = py - t * dy
+    return x0, y0, ex * ex + ey * ey <= radius * radius
+
+#maska scian z opisu wektorowego w dowolnej skali - wszystko poza kreskami, plus ramka
+def vector_wall_mask(vector, scale=1.0):
+    width = int(round(vector["width"] * scale))
+    height = int(round(vector["height"] * scale))
+    road = np.zeros((width, height), dtype=bool)
+    for stroke in vector["strokes"]:
+        radius = stroke["radius"] * scale
+        points = [(x * scale, y * scale) for x, y in stroke["points"]]
+        for p0, p1 in zip(points, points[1:] or points):
+            x0, y0, patch = segment_patch(p0, p1, radius, width, height)
+            road[x0:x0 + patch.shape[0], y0:y0 + patch.shape[1]] |= patch
+    wall = ~road
+    wall[0, :] = wall[-1, :] = True
+    wall[:, 0] = wall[:, -1] = True
+    return wall
+
+#skrot PNG i (jesli jest) opisu wektorowego - zmiana ktoregokolwiek przebudowuje cache
+def file_hash(path):
+    digest = hashlib.sha256()
+    for source in (path, vector_path(path)):
+        if os.path.exists(source):
+            with open(source, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_path(png_path):
+    name = os.path.splitext(os.path.basename(png_path))[0]
+    return os.path.join(CACHE_DIR, f"{name}.track")
+
+
+#skompilowana trasa: naglowek JSON (HEADER_SIZE bajtow), spakowana bitowo maska scian
+#i pole odleglosci jako uint8 (zaokraglone w dol, wiec dalej bezpieczne dla sphere tracingu),
+#na koncu siatka postepu jako float32;
+#trasy z edytora maja opis wektorowy, z ktorego maska powstaje bez dekodowania PNG
+def compile_track(png_path, out_path=None, png_hash=None):
+    out_path = out_path or cache_path(png_path)
+    vector = load_vector(png_path)
+    wall = vector_wall_mask(vector) if vector else wall_mask(pygame.image.load(png_path))
+    packed = np.packbits(wall, axis=1)
+    field = distance_field(wall)
+    start_pos, start_angle = place_start(wall, field, vector["start_pos"] if vector else START_POS,
+                                         vector.get("start_orientation", "vertical") if vector else "vertical")
+    field = field.astype(np.uint8)
+    dx, dy = HEADINGS[start_angle]
+    cut = (int(start_pos[0] + CAR_SIZE_X / 2 * (1 - dx)), int(start_pos[1] + CAR_SIZE_Y / 2 * (1 - dy)))
+    progress, lap_length, start_line = progress_grid(wall, cut, start_angle)
+    header = {
+        "format": CACHE_FORMAT,
+        "hash": png_hash or file_hash(png_path),
+        "border_color": list(BORDER_COLOR),
+        "dist_cap": DIST_CAP,
+        "width": wall.shape[0],
+        "height": wall.shape[1],
+        "packed_height": packed.shape[1],
+        "start_pos": start_pos,
+        "start_angle": start_angle,
+        "start_line": start_line,
+        "progress_cell": PROGRESS_CELL,
+        "progress_width": progress.shape[0],
+        "progress_height": progress.shape[1],
+        "lap_length": lap_length,
+    }
+    raw = json.dumps(header).encode()
+    if len(raw) > HEADER_SIZE:
+        raise ValueError("Naglowek trasy za dlugi")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    #zapis do pliku tymczasowego i podmiana, zeby rownolegle procesy nie czytaly polowy pliku
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw.ljust(HEADER_SIZE, b" "))
+        f.write(np.ascontiguousarray(packed).tobytes())
+        f.write(np.ascontiguousarray(field).tobytes())
+        f.write(np.ascontiguousarray(progress).tobytes())
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return json.loads(f.read(HEADER_SIZE))
+
+def cache_is_valid(header, png_hash):
+    return (header.get("format") == CACHE_FORMAT and header.get("hash") == png_hash
+            and header.get("border_color") == list(BORDER_COLOR) and header.get("dist_cap") == DIST_CAP
+            and header.get("progress_cell") == PROGRESS_CELL)
+
+class Track:
+    def __init__(self, path, png_path):
+        header = read_header(path)
+        self.png_path = png_path
+        self.hash = header["hash"]
+        self.width = header["width"]
+        self.height = header["height"]
+        self.start_pos = tuple(header["start_pos"])
+        self.start_angle = header["start_angle"]
+        self.start_line = [tuple(point) for point in header["start_line"]]
+        self.progress_cell = header["progress_cell"]
+        self.lap_length = header["lap_length"]
+        #memmap - procesy robocze dziela jedna kopie w page cache
+        packed_size = self.width * header["packed_height"]
+        self.packed_wall = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE,
+                                     shape=(self.width, header["packed_height"]))
+        self.field = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE + packed_size,
+                               shape=(self.width, self.height))
+        self.progress = np.memmap(path, dtype=np.float32, mode="r",
+                                  offset=HEADER_SIZE + packed_size + self.width * self.height,
+                                  shape=(header["progress_width"], header["progress_height"]))
+        self._surface = None
+
+    #obraz trasy jest potrzebny tylko do rysowania
+    @property
+    def surface(self):
+        if self._surface is None:
+            self._surface = pygame.image.load(self.png_path)
+            if pygame.display.get_surface() is not None:
+                self._surface = self._surface.convert()
+        return self._surface
+
+    def is_wall(self, x, y):
+        x = np.clip(x, 0, self.width - 1)
+        y = np.clip(y, 0, self.height - 1)
+        return (self.packed_wall[x, y >> 3] >> (7 - (y & 7))) & 1 == 1
+
+    def distance(self, x, y):
+        x = np.clip(x, 0, self.width - 1)
+        y = np.clip(y, 0, self.height - 1)
+        return self.field[x, y]
+
+    #droga od linii startu dla punktow (x, y), -1 na scianie
+    def progress_at(self, x, y):
+        gx = np.clip(np.asarray(x, dtype=np.int64) // self.progress_cell, 0, self.progress.shape[0] - 1)
+        gy = np.clip(np.asarray(y, dtype=np.int64) // self.progress_cell, 0, self.progress.shape[1] - 1)
+        return self.progress[gx, gy].astype(np.float64)
+
+    def cast_rays(self, cx, cy, angles, max_range=RADAR_RANGE):
+        rad = np.radians(360 - np.asarray(angles, dtype=np.float64))
+        return self.cast_dirs(cx, cy, np.cos(rad), np.sin(rad), max_range)
+
+    #sphere tracing wszystkich promieni naraz (kierunki jako wektory jednostkowe); wynik jak
+    #w krokowym check_radar: pierwsza calkowita dlugosc, dla ktorej piksel jest sciana (najwyzej max_range)
+    def cast_dirs(self, cx, cy, dx, dy, max_range=RADAR_RANGE):
+        cx, cy, dx, dy = np.broadcast_arrays(np.asarray(cx, dtype=np.float64),
+                                             np.asarray(cy, dtype=np.float64), dx, dy)
+        shape = dx.shape
+        cx, cy, dx, dy = cx.ravel(), cy.ravel(), dx.ravel(), dy.ravel()
+        length = np.zeros(cx.shape, dtype=np.int64)
+        x = cx.astype(np.int64)
+        y = cy.astype(np.int64)
+
+        #aktywne promienie trzymamy jako indeksy, koszt iteracji zalezy tylko od nich
+        rays = np.arange(len(cx))
+        for _ in range(SPHERE_STEPS):
+            rays = rays[~self.is_wall(x[rays], y[rays]) & (length[rays] < max_range)]
+            if len(rays) == 0:
+                break
+            #kolejne probki w odleglosci < field - sqrt(2) na pewno nie sa sciana
+            step = np.maximum(1, (self.distance(x[rays], y[rays]) - 1.4143).astype(np.int64) + 1)
+            length[rays] = np.minimum(length[rays] + step, max_range)
+            x[rays] = (cx[rays] + dx[rays] * length[rays]).astype(np.int64)
+            y[rays] = (cy[rays] + dy[rays] * length[rays]).astype(np.int64)
+        else:
+            rays = rays[~self.is_wall(x[rays], y[rays]) & (length[rays] < max_range)]
+            if len(rays):
+                self.finish_rays(rays, length, x, y, cx, cy, dx, dy, max_range)
+
+        dist = np.hypot(x - cx, y - cy).astype(np.int64)
+        return x.reshape(shape), y.reshape(shape), dist.reshape(shape)
+
+    #pozostale promienie: wszystkie dlugosci od biezacej do max_range w jednej macierzy
+    def finish_rays(self, rays, length, x, y, cx, cy, dx, dy, max_range):
+        offsets = np.arange(1, max_range + 1)
+        lengths = np.minimum(length[rays, None] + offsets, max_range)
+        xs = (cx[rays, None] + dx[rays, None] * lengths).astype(np.int64)
+        ys = (cy[rays, None] + dy[rays, None] * lengths).astype(np.int64)
+        hit = self.is_wall(xs, ys) | (lengths == max_range)
+        first = hit.argmax(axis=1)
+        length[rays] = lengths[np.arange(len(rays)), first]
+        x[rays] = xs[np.arange(len(rays)), first]
+        y[rays] = ys[np.arange(len(rays)), first]
+
+#trasa z cache; cache przebudowuje sie sam, gdy zmieni sie PNG
+def load_track(png_path):
+    png_hash = file_hash(png_path)
+    path = cache_path(png_path)
+    if not os.path.exists(path) or not cache_is_valid(read_header(path), png_hash):
+        compile_track(png_path, path, png_hash)
+    return Track(path, png_path)
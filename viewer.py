@@ -0,0 +1,135 @@
+import os
+import sys
+import argparse
+import pygame
+from engine import WIDTH, HEIGHT, CAR_SIZE_X, CAR_SIZE_Y
+from track import load_track
+from replay import ReplaySet, generation_tracks, recorded_generations
+from sprites import load_sprite_atlas, ROTATION_STEP
+
+#odtwarzanie powtorek z simulation.py --record-dir bez liczenia sieci i radarow
+#spacja - pauza, strzalki lewo/prawo - przewijanie o sekunde, gora/dol - tempo x2 / /2,
+#PageUp/PageDown - poprzednia/nastepna generacja, T - nastepna trasa generacji,
+#klik w pasek postepu - skok w to miejsce
+
+MIN_PLAYBACK = 0.125
+MAX_PLAYBACK = 32
+BAR = pygame.Rect(20, HEIGHT - 40, WIDTH - 40, 16)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Odtwarzanie zapisanych generacji")
+    parser.add_argument("directory", help="katalog z powtorkami (--record-dir)")
+    parser.add_argument("--generation", type=int, default=None,
+                        help="domyslnie ostatnia zapisana")
+    parser.add_argument("--speed", type=float, default=1)
+    parser.add_argument("--car", default=None, help="domyslnie auto zapisane w powtorce")
+    return parser.parse_args()
+
+class Viewer:
+    def __init__(self, directory, generations, car=None):
+        self.directory = directory
+        self.generations = generations
+        self.car = car
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Powtórka")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont("Arial", 30)
+        self.tracks = {}
+        self.track_file = None
+
+    def open(self, generation, track_file=None):
+        self.generation = generation
+        self.generation_tracks = generation_tracks(self.directory, generation)
+        track_file = track_file or self.track_file
+        if track_file not in self.generation_tracks:
+            track_file = sorted(self.generation_tracks)[0]
+        self.track_file = track_file
+        self.replay = ReplaySet(self.generation_tracks[track_file])
+        header = self.replay.header
+        if track_file not in self.tracks:
+            self.tracks[track_file] = load_track(os.path.join("maps", track_file))
+        self.track = self.tracks[track_file]
+        self.atlas = load_sprite_atlas(self.car or header.get("car") or "car1.png", (CAR_SIZE_X, CAR_SIZE_Y))
+        self.ticks_per_second = header["ticks_per_second"]
+        self.tick = 0.0
+
+    def step_generation(self, offset):
+        i = self.generations.index(self.generation) + offset
+        if 0 <= i < len(self.generations):
+            self.open(self.generations[i])
+
+    def next_track(self):
+        names = sorted(self.generation_tracks)
+        self.open(self.generation, names[(names.index(self.track_file) + 1) % len(names)])
+
+    def draw(self, speed, paused):
+        frame = self.replay.frame(self.tick)
+        self.screen.blit(self.track.surface, (0, 0))
+        for x, y, angle, alive in zip(frame["x"], frame["y"], frame["angle"], frame["alive"]):
+            if alive:
+                sprite = self.atlas[int(round(angle / ROTATION_STEP)) % len(self.atlas)]
+                self.screen.blit(sprite, (x, y))
+
+        tick = int(self.tick)
+        stats = [
+            f"Generacja: {self.generation} ({self.track_file})",
+            f"Liczba aut: {int(frame['alive'].sum())} / {self.replay.count}",
+            f"Czas: {tick / self.ticks_per_second:.2f}s / {(self.replay.ticks - 1) / self.ticks_per_second:.2f}s",
+            f"Tempo: x{speed:g}" + (" (pauza)" if paused else ""),
+        ]
+        for i, stat in enumerate(stats):
+            self.screen.blit(self.font.render(stat, True, (0, 0, 0)), (20, i * 30))
+
+        pygame.draw.rect(self.screen, (80, 80, 80), BAR)
+        done = BAR.copy()
+        done.width = int(BAR.width * tick / max(1, self.replay.ticks - 1))
+        pygame.draw.rect(self.screen, (0, 200, 0), done)
+        pygame.display.flip()
+
+    def run(self, speed=1):
+        paused = False
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                elif event.type == pygame.MOUSEBUTTONDOWN and BAR.collidepoint(event.pos):
+                    self.tick = (event.pos[0] - BAR.x) / BAR.width * (self.replay.ticks - 1)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        return
+                    elif event.key == pygame.K_SPACE:
+                        paused = not paused
+                    elif event.key == pygame.K_LEFT:
+                        self.tick = max(0, self.tick - self.ticks_per_second)
+                    elif event.key == pygame.K_RIGHT:
+                        self.tick = min(self.replay.ticks - 1, self.tick + self.ticks_per_second)
+                    elif event.key == pygame.K_UP:
+                        speed = min(MAX_PLAYBACK, speed * 2)
+                    elif event.key == pygame.K_DOWN:
+                        speed = max(MIN_PLAYBACK, speed / 2)
+                    elif event.key == pygame.K_PAGEUP:
+                        self.step_generation(-1)
+                    elif event.key == pygame.K_PAGEDOWN:
+                        self.step_generation(1)
+                    elif event.key == pygame.K_t:
+                        self.next_track()
+
+            dt = self.clock.tick(60) / 1000
+            if not paused:
+                self.tick = min(self.replay.ticks - 1, self.tick + dt * speed * self.ticks_per_second)
+            self.draw(speed, paused)
+
+if __name__ == "__main__":
+    args = parse_args()
+    generations = recorded_generations(args.directory)
+    if not generations:
+        print(f"Brak powtorek w {args.directory}")
+        sys.exit(1)
+    if args.generation is not None and args.generation not in generations:
+        print(f"Brak powtorki generacji {args.generation}")
+        sys.exit(1)
+    pygame.init()
+    viewer = Viewer(args.directory, generations, args.car)
+    viewer.open(args.generation if args.generation is not None else generations[-1])
+    viewer.run(args.speed)
+    pygame.quit()